@@ -0,0 +1,91 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import User
+from . import cache as response_cache
+
+CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'claims_version'
+MISSING = object()
+
+
+class ClaimsAccessToken(AccessToken):
+    """
+    Токен доступа, в который записаны имя, роль и флаги пользователя и
+    версия этих утверждений (User.claims_version).
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.claims_version
+        return token
+
+
+def build_user(user_id, claims):
+    """
+    Пользователь, собранный из утверждений токена без запроса к базе.
+    Остальные поля у него пустые, поэтому сохранять его нельзя.
+    """
+    user = User(id=user_id, is_active=True, **claims)
+    user._state.adding = False
+    return user
+
+
+def get_claims_version(user_id):
+    """
+    Версия утверждений активного пользователя или None, если его нет
+    или он отключён. Версия хранится в таблице пользователей, кеш держит
+    её копию AUTH_CLAIMS_VERSION_TIMEOUT секунд: вытеснение из кеша стоит
+    одного запроса к базе, а не принятого на веру отозванного токена.
+    """
+    cache = response_cache.get_cache()
+    key = response_cache.USER_VERSION.format(user_id)
+    version = cache.get(key, MISSING)
+    if version is MISSING:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('claims_version', flat=True).first()
+        cache.set(key, version, settings.AUTH_CLAIMS_VERSION_TIMEOUT)
+    return version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по утверждениям ClaimsAccessToken, если их версия
+    совпадает с текущей версией пользователя. Иначе, и для токенов без
+    утверждений, пользователь загружается из базы, и его утверждения
+    кешируются на AUTH_USER_CACHE_TIMEOUT секунд под текущей версией.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит идентификатор пользователя.')
+        version = get_claims_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или отключён.', code='user_not_found')
+        if (validated_token.get(VERSION_CLAIM) == version
+                and all(claim in validated_token for claim in CLAIMS)):
+            return build_user(user_id, {
+                claim: validated_token[claim] for claim in CLAIMS})
+        return self.get_cached_user(user_id, version, validated_token)
+
+    def get_cached_user(self, user_id, version, validated_token):
+        cache = response_cache.get_cache()
+        key = response_cache.USER_CLAIMS.format(user_id, version)
+        claims = cache.get(key)
+        if claims is not None:
+            return build_user(user_id, claims)
+        user = super().get_user(validated_token)
+        cache.set(key, {claim: getattr(user, claim) for claim in CLAIMS},
+                  settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
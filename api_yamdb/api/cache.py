@@ -0,0 +1,146 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from reviews.models import DataVersion
+from .reference import CATALOG, invalidate_snapshots
+
+PREFIX = 'titles'
+# Версия каталога общая со снимками справочников из reference.
+CATALOG_VERSION = CATALOG
+LIST_VERSION = f'{PREFIX}:list'
+DETAIL_VERSION = PREFIX + ':detail:{}'
+REVIEWS_VERSION = 'reviews:title:{}'
+COMMENTS_VERSION = 'comments:review:{}'
+AUTHORS_VERSION = 'authors'
+USER_VERSION = 'auth:version:{}'
+USER_CLAIMS = 'auth:user:{}:{}'
+HITS = f'{PREFIX}:stats:hits'
+MISSES = f'{PREFIX}:stats:misses'
+# Кеши, общие для всех процессов, с атомарным incr. В остальных
+# счётчики попаданий видны только своему процессу (LocMemCache) или
+# теряют увеличения при одновременной записи (FileBasedCache,
+# DatabaseCache).
+SHARED_COUNTER_BACKENDS = (
+    'django.core.cache.backends.memcached.MemcachedCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.redis.RedisCache',
+    'django_redis.cache.RedisCache',
+)
+
+
+def get_cache():
+    return caches[settings.TITLE_CACHE_ALIAS]
+
+
+def get_cache_backend():
+    return settings.CACHES[settings.TITLE_CACHE_ALIAS]['BACKEND']
+
+
+def has_shared_stats():
+    return get_cache_backend() in SHARED_COUNTER_BACKENDS
+
+
+def get_versions(*keys):
+    """
+    Версии коллекций читаются из основной базы (DataVersion), а не из
+    кеша: кеш в памяти процесса не видит записей других процессов и
+    команд вроде importcsv.
+    """
+    return DataVersion.objects.using(DEFAULT_DB_ALIAS).current_many(*keys)
+
+
+def bump(*keys):
+    """
+    Версии сдвигаются в транзакции изменения и становятся видны вместе
+    с ним: параллельный читатель до фиксации видит и прежние данные, и
+    прежние версии.
+    """
+    DataVersion.objects.bump(*keys)
+
+
+def invalidate_title(*title_ids):
+    bump(LIST_VERSION, *(DETAIL_VERSION.format(pk) for pk in title_ids))
+
+
+def invalidate_catalog():
+    invalidate_snapshots()
+
+
+def invalidate_reviews(*title_ids):
+    bump(*(REVIEWS_VERSION.format(pk) for pk in title_ids))
+
+
+def invalidate_comments(*review_ids):
+    bump(*(COMMENTS_VERSION.format(pk) for pk in review_ids))
+
+
+def invalidate_authors():
+    bump(AUTHORS_VERSION)
+
+
+def invalidate_user(user_id):
+    """
+    Забывает копию версии утверждений пользователя после фиксации:
+    следующий запрос с его токеном сверится с базой. Процессы с другим
+    кешем сверятся не позже чем через AUTH_CLAIMS_VERSION_TIMEOUT секунд.
+    """
+    transaction.on_commit(
+        lambda: get_cache().delete(USER_VERSION.format(user_id)))
+
+
+def invalidate_all():
+    """Сбрасывает все версии, например после массовой загрузки данных."""
+    bump(AUTHORS_VERSION)
+    invalidate_snapshots()
+
+
+def normalize_query(request):
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    )
+    params.append(('host', request.get_host()))
+    return md5(urlencode(params).encode()).hexdigest()
+
+
+def build_key(request, title_id=None, versions=None):
+    """
+    `versions` — уже прочитанные в этом запросе версии (например, для
+    ETag), чтобы не читать их из базы второй раз.
+    """
+    scope = LIST_VERSION if title_id is None else DETAIL_VERSION.format(
+        title_id)
+    if versions is None or not {CATALOG_VERSION, scope} <= versions.keys():
+        versions = get_versions(CATALOG_VERSION, scope)
+    return (f'{PREFIX}:response:{versions[CATALOG_VERSION]}:'
+            f'{scope}:{versions[scope]}:{normalize_query(request)}')
+
+
+def count(key):
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats():
+    stats = get_cache().get_many((HITS, MISSES))
+    hits, misses = stats.get(HITS, 0), stats.get(MISSES, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    get_cache().delete_many((HITS, MISSES))
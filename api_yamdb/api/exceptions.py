@@ -0,0 +1,24 @@
+from rest_framework import status, views
+from rest_framework.exceptions import APIException
+
+from api_yamdb.sqlite3.writequeue import WriteQueueError
+
+WRITE_QUEUE_RETRY_AFTER = 1
+
+
+class WriteQueueBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервис перегружен записью, повторите запрос позже.'
+    default_code = 'write_queue_busy'
+
+
+def exception_handler(exc, context):
+    """
+    Отвечает 503 с Retry-After, если запись не дождалась очереди
+    писателей: клиент получает быстрый предсказуемый отказ вместо 500.
+    """
+    if isinstance(exc, WriteQueueError):
+        response = views.exception_handler(WriteQueueBusy(), context)
+        response['Retry-After'] = str(WRITE_QUEUE_RETRY_AFTER)
+        return response
+    return views.exception_handler(exc, context)
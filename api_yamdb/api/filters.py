@@ -1,7 +1,30 @@
+import re
+
 import django_filters
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from rest_framework.filters import BaseFilterBackend, SearchFilter
 
 from reviews.models import Title
 
+SEARCH_TOKEN = re.compile(r'\w+')
+RANK_SQL = ('SELECT -bm25({table}{weights}) FROM {table} '
+            'WHERE {table} MATCH %s AND rowid = {outer}.id')
+MATCH_SQL = 'SELECT rowid FROM {table} WHERE {table} MATCH %s'
+TRIGRAM = 3
+
+
+def build_match(query):
+    """
+    Превращает пользовательскую строку в запрос FTS5: каждое слово
+    берётся в кавычки и ищется по префиксу, операторы FTS5 не работают.
+    """
+    return ' '.join(
+        '"{}"*'.format(token) for token in SEARCH_TOKEN.findall(query)
+    )
+
 
 class TitleFilter(django_filters.FilterSet):
     category = django_filters.CharFilter(field_name='category__slug',
@@ -12,3 +35,76 @@ class TitleFilter(django_filters.FilterSet):
     class Meta:
         model = Title
         fields = ('name', 'year')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по таблице FTS5 представления (`fts_table`).
+    Найденные записи сортируются по релевантности bm25 с весами колонок
+    `fts_weights`; если задано `fts_rating_field`, к релевантности
+    добавляется рейтинг с весом SEARCH_RATING_WEIGHT. Явный параметр
+    `ordering` имеет приоритет над сортировкой по релевантности.
+    """
+
+    search_param = 'search'
+    rank_field = 'search_rank'
+
+    def get_match(self, request):
+        return build_match(request.query_params.get(self.search_param, ''))
+
+    def filter_queryset(self, request, queryset, view):
+        if self.search_param not in request.query_params:
+            return queryset
+        match = self.get_match(request)
+        if not match:
+            return queryset.none()
+        table = view.fts_table
+        weights = ''.join(
+            f', {weight}' for weight in getattr(view, 'fts_weights', ()))
+        rank = RawSQL(
+            RANK_SQL.format(table=table, weights=weights,
+                            outer=queryset.model._meta.db_table),
+            (match,), output_field=FloatField()
+        )
+        rating_field = getattr(view, 'fts_rating_field', None)
+        if rating_field:
+            rank = rank + Value(settings.SEARCH_RATING_WEIGHT) * Coalesce(
+                F(rating_field), Value(0.0))
+        queryset = queryset.filter(
+            pk__in=RawSQL(MATCH_SQL.format(table=table), (match,))
+        ).annotate(**{self.rank_field: rank})
+        ordering = self.get_ordering(request, queryset, view)
+        if ordering:
+            queryset = queryset.order_by(*ordering, 'pk')
+        return queryset
+
+    def get_ordering(self, request, queryset, view):
+        if (not self.get_match(request)
+                or 'ordering' in request.query_params):
+            return None
+        return [f'-{self.rank_field}']
+
+
+class UsernameSearchFilter(SearchFilter):
+    """
+    Поиск пользователей по вхождению строки в `username`, как у
+    SearchFilter. Слова от трёх символов ищутся по триграммному индексу
+    FTS5. Более короткие ищутся через LIKE в подзапросе, которому нужны
+    только ключ и имя: просматривается узкий уникальный индекс имён, а
+    не таблица.
+    """
+
+    fts_table = 'reviews_user_fts'
+
+    def filter_queryset(self, request, queryset, view):
+        for term in self.get_search_terms(request):
+            if len(term) >= TRIGRAM:
+                queryset = queryset.filter(pk__in=RawSQL(
+                    MATCH_SQL.format(table=self.fts_table),
+                    ('"{}"'.format(term.replace('"', '""')),)
+                ))
+            else:
+                queryset = queryset.filter(
+                    pk__in=queryset.model.objects.filter(
+                        username__icontains=term).values('pk'))
+        return queryset
@@ -0,0 +1,99 @@
+import datetime as dt
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.utils import timezone
+
+from reviews.models import OutgoingMail
+
+RECIPIENT_SEPARATOR = '\n'
+
+
+def queue_mail(subject, message, recipient_list, from_email=None):
+    """
+    Ставит письмо в очередь, если она включена (EMAIL_QUEUE_ENABLED),
+    иначе отправляет его сразу, как send_mail().
+    """
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    if not settings.EMAIL_QUEUE_ENABLED:
+        return send_mail(subject, message, from_email, recipient_list,
+                         fail_silently=False)
+    return OutgoingMail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=RECIPIENT_SEPARATOR.join(recipient_list),
+    )
+
+
+def get_retry_delay(attempts):
+    return dt.timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size):
+    """
+    Забирает пачку писем, срок отправки которых наступил, сдвигая их
+    срок на время аренды: письма, взятые другим обработчиком, и письма
+    упавшего обработчика не отправятся дважды, а вернутся в очередь.
+    """
+    now = timezone.now()
+    lease_until = now + dt.timedelta(seconds=settings.EMAIL_QUEUE_LEASE)
+    pks = list(OutgoingMail.objects.filter(
+        sent_at__isnull=True,
+        send_after__lte=now,
+        attempts__lt=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+    ).values_list('pk', flat=True)[:batch_size])
+    OutgoingMail.objects.filter(
+        pk__in=pks, send_after__lte=now).update(send_after=lease_until)
+    return list(OutgoingMail.objects.filter(
+        pk__in=pks, send_after=lease_until))
+
+
+def schedule_retry(mail, error):
+    mail.attempts += 1
+    mail.last_error = repr(error)
+    mail.send_after = timezone.now() + get_retry_delay(mail.attempts)
+
+
+def deliver_batch(batch_size=None):
+    """
+    Отправляет одну пачку писем через одно соединение с почтовым
+    сервером. Возвращает количество отправленных и неудачных писем.
+    """
+    mails = claim_batch(batch_size or settings.EMAIL_QUEUE_BATCH_SIZE)
+    if not mails:
+        return 0, 0
+    sent = []
+    failed = []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for mail in mails:
+            try:
+                connection.send_messages([EmailMessage(
+                    mail.subject, mail.body, mail.from_email,
+                    mail.recipients.split(RECIPIENT_SEPARATOR),
+                )])
+            except Exception as error:
+                schedule_retry(mail, error)
+                failed.append(mail)
+            else:
+                sent.append(mail.pk)
+    except Exception as error:
+        for mail in mails:
+            if mail.pk not in sent and mail not in failed:
+                schedule_retry(mail, error)
+                failed.append(mail)
+    finally:
+        connection.close()
+    OutgoingMail.objects.filter(pk__in=sent).update(sent_at=timezone.now())
+    OutgoingMail.objects.bulk_update(
+        failed, ('attempts', 'last_error', 'send_after'))
+    return len(sent), len(failed)
+
+
+def purge_expired():
+    """Удаляет отправленные и брошенные письма старше срока хранения."""
+    deleted, _ = OutgoingMail.objects.expired().delete()
+    return deleted
@@ -1,9 +1,48 @@
-from rest_framework import filters, mixins, viewsets
+from hashlib import md5
 
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import quote_etag
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from . import cache as response_cache
+from . import replicas
 from .permissions import IsAdminOrReadOnly
 
 
-class CreateListDestroyViewSet(mixins.CreateModelMixin,
+class ReplicaReadMixin:
+    """
+    Читает безопасные запросы из реплики. После успешной записи
+    пользователь на REPLICA_PIN_TIMEOUT секунд закрепляется за основной
+    базой и видит свои изменения сразу.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            self.replica_token = replicas.use_replica(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        token = getattr(self, 'replica_token', None)
+        if token is not None:
+            replicas.release(token)
+            self.replica_token = None
+        elif (request.method not in SAFE_METHODS
+                and status.is_success(response.status_code)
+                and request.user.is_authenticated):
+            replicas.pin(response, request.user)
+        return response
+
+
+class CreateListDestroyViewSet(ReplicaReadMixin,
+                               mixins.CreateModelMixin,
                                mixins.ListModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
@@ -11,3 +50,167 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin,
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+
+
+class ReferenceListMixin:
+    """
+    Отдаёт список справочника из снимка в памяти процесса (`reference`),
+    не обращаясь к базе. Поиск повторяет SearchFilter по полю `name`.
+    """
+
+    reference = None
+
+    def list(self, request, *args, **kwargs):
+        objects = self.reference.search(
+            filters.SearchFilter().get_search_terms(request))
+        page = self.paginate_queryset(objects)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.get_serializer(objects, many=True).data)
+
+
+class NestedResourceMixin:
+    """
+    Вложенный ресурс, который фильтруется по ключам родителя из URL без
+    загрузки самого родителя. Существование родителя проверяется одним
+    запросом EXISTS и запоминается до конца запроса; для чтения
+    отдельных объектов проверка не нужна — их и так ищут по ключам.
+    Если у родителя есть счётчик вложенных записей (`parent_count_field`),
+    тот же запрос читает его для пагинации.
+    """
+
+    parent_model = None
+    parent_lookups = {}
+    parent_count_field = None
+
+    def get_parent_filter(self):
+        return {
+            field: self.kwargs[kwarg]
+            for field, kwarg in self.parent_lookups.items()
+        }
+
+    def check_parent(self):
+        if getattr(self, 'parent_exists', None) is None:
+            parents = self.parent_model.objects.filter(
+                **self.get_parent_filter())
+            if self.parent_count_field is None:
+                self.parent_exists = parents.exists()
+            else:
+                row = parents.values_list(self.parent_count_field).first()
+                self.parent_exists = row is not None
+                self.parent_count = row[0] if row else None
+        if not self.parent_exists:
+            raise Http404
+
+    def get_stored_count(self):
+        """
+        Количество вложенных записей из счётчика родителя
+        (`parent_count_field`), прочитанного вместе с проверкой
+        существования: пагинации не нужен отдельный COUNT(*).
+        """
+        if self.parent_count_field is None:
+            return None
+        self.check_parent()
+        return self.parent_count
+
+    def list(self, request, *args, **kwargs):
+        self.check_parent()
+        return super().list(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        self.check_parent()
+        return super().create(request, *args, **kwargs)
+
+
+class CachedListRetrieveMixin:
+    """
+    Кеширует ответы list и retrieve произведений. Ключ строится по
+    нормализованным параметрам запроса и версиям, которые сдвигаются
+    сигналами из api.signals при изменении связанных данных.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            response_cache.build_key(
+                request, versions=getattr(self, 'versions', None)),
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            response_cache.build_key(
+                request,
+                kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+                versions=getattr(self, 'versions', None)
+            ),
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, key, handler, request, *args, **kwargs):
+        cache = response_cache.get_cache()
+        data = cache.get(key)
+        if data is not None:
+            response_cache.count(response_cache.HITS)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response_cache.count(response_cache.MISSES)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.get_cache_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_cache_timeout(self):
+        return settings.TITLE_CACHE_TIMEOUT
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 на If-None-Match до обращения к сериализаторам. ETag
+    строится по версиям коллекции из базы (DataVersion), которые возвращает
+    обязательный метод представления get_validator_keys(), поэтому тело
+    ответа для его вычисления не нужно. Last-Modified не выводится:
+    версии точнее секунды, и If-Modified-Since пропустил бы второе
+    изменение за ту же секунду.
+    """
+
+    cache_control = {'public': True, 'max_age': 0}
+    vary_headers = ('Accept',)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'get_validator_keys', None)):
+            raise ImproperlyConfigured(
+                f'{cls.__name__} должен определять get_validator_keys() '
+                '— ключи версий коллекции.')
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        versions = response_cache.get_versions(*self.get_validator_keys())
+        self.versions = versions
+        replicas.require(max(versions.values()))
+        etag = quote_etag(md5(':'.join((
+            self.action,
+            *(str(versions[key]) for key in sorted(versions)),
+            response_cache.normalize_query(request),
+            request.META.get('HTTP_ACCEPT', ''),
+        )).encode()).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        patch_cache_control(response, **self.cache_control)
+        patch_vary_headers(response, self.vary_headers)
+        return response
@@ -0,0 +1,271 @@
+import datetime as dt
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def encode_position_value(value):
+    """Даты сохраняются с микросекундами, иначе курсор теряет точность."""
+    if isinstance(value, (dt.date, dt.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def get_ordering_field(queryset, path):
+    """
+    Поле сортировки: аннотация выборки или поле модели, в том числе
+    через связи; для внешнего ключа — поле, на которое он ссылается.
+    None, если поле не найдено.
+    """
+    annotation = queryset.query.annotations.get(path)
+    if annotation is not None:
+        return annotation.output_field
+    model = queryset.model
+    field = None
+    for name in path.split('__'):
+        if model is None:
+            return None
+        try:
+            field = (model._meta.pk if name == 'pk'
+                     else model._meta.get_field(name))
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model
+    if field.is_relation and field.concrete:
+        field = field.target_field
+    return field
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу сортировки (keyset): страница выбирается условием
+    WHERE по значениям последней записи, а не через OFFSET, поэтому
+    глубокие страницы стоят столько же, сколько первая.
+
+    Порядок берётся из последнего фильтра представления, задающего
+    сортировку, атрибута `ordering` или Meta.ordering модели и всегда
+    дополняется первичным ключом.
+    Запросы с параметром `page` обслуживаются прежней постраничной
+    пагинацией для совместимости со старыми клиентами.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def __init__(self):
+        self.legacy = None
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if PageNumberPagination.page_query_param in request.query_params:
+            self.legacy = PageNumberPagination()
+            return self.legacy.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        reverse, position = self.decode_cursor(request)
+
+        self.count = (
+            self.get_count(queryset, request, view)
+            if self.include_count(request) else None
+        )
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(
+                self.clean_position(queryset, position), reverse))
+        queryset = queryset.order_by(
+            *self.get_order_by(reverse=reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(
+                request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return getattr(settings, 'PAGINATION_INCLUDE_COUNT', True)
+        return value.lower() not in FALSE_VALUES
+
+    def get_count(self, queryset, request, view):
+        """
+        Для выборки без фильтров представление может отдать хранимое
+        количество записей (`get_stored_count`), например счётчик
+        родителя вложенного списка; иначе выполняется COUNT(*).
+        """
+        get_stored_count = getattr(view, 'get_stored_count', None)
+        if get_stored_count is not None and set(request.query_params) <= {
+                self.cursor_query_param, self.page_size_query_param,
+                self.count_query_param}:
+            count = get_stored_count()
+            if count is not None:
+                return count
+        return queryset.count()
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        ordering_filters = [
+            backend for backend in getattr(view, 'filter_backends', ())
+            if hasattr(backend, 'get_ordering')
+        ]
+        for backend in reversed(ordering_filters):
+            ordering = backend().get_ordering(request, queryset, view)
+            if ordering:
+                break
+        if not ordering:
+            ordering = (getattr(view, 'ordering', None)
+                        or queryset.model._meta.ordering)
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = list(ordering)
+        if not {'pk', '-pk', 'id', '-id'} & set(ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return [
+            (field.lstrip('-'), field.startswith('-')) for field in ordering
+        ]
+
+    def get_order_by(self, reverse=False):
+        """
+        NULL всегда считается наименьшим значением, чтобы условие по
+        курсору не зависело от правил сортировки конкретной СУБД.
+        """
+        order_by = []
+        for field, descending in self.ordering:
+            if descending != reverse:
+                order_by.append(F(field).desc(nulls_last=True))
+            else:
+                order_by.append(F(field).asc(nulls_first=True))
+        return order_by
+
+    def clean_position(self, queryset, position):
+        """
+        Приводит значения курсора к типам полей сортировки: курсор с
+        неподходящим значением — некорректный курсор, а не ошибка
+        запроса к базе.
+        """
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        cleaned = []
+        for (path, _), value in zip(self.ordering, position):
+            if isinstance(value, (dict, list)):
+                raise NotFound(self.invalid_cursor_message)
+            field = get_ordering_field(queryset, path)
+            if value is not None and field is not None:
+                try:
+                    value = field.to_python(value)
+                except (TypeError, ValueError, ValidationError):
+                    raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+        return cleaned
+
+    def get_keyset_filter(self, position, reverse):
+        conditions = []
+        equal = []
+        for (field, descending), value in zip(self.ordering, position):
+            conditions.append(reduce(and_, equal + [
+                self.get_after_filter(field, value, descending != reverse)
+            ]))
+            equal.append(
+                Q(**{f'{field}__isnull': True}) if value is None
+                else Q(**{field: value})
+            )
+        return reduce(or_, conditions)
+
+    def get_after_filter(self, field, value, descending):
+        if value is None:
+            if descending:
+                return Q(pk__in=[])
+            return Q(**{f'{field}__isnull': False})
+        if descending:
+            return (Q(**{f'{field}__lt': value})
+                    | Q(**{f'{field}__isnull': True}))
+        return Q(**{f'{field}__gt': value})
+
+    def get_position(self, instance):
+        position = []
+        for field, _ in self.ordering:
+            value = instance
+            for attr in field.split('__'):
+                value = getattr(value, attr, None)
+            position.append(getattr(value, 'pk', value))
+        return position
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, self.get_position(self.page[0]))
+
+    def encode_cursor(self, reverse, position):
+        cursor = json.dumps(
+            {'r': int(reverse), 'p': position},
+            default=encode_position_value,
+            separators=(',', ':')
+        )
+        encoded = urlsafe_b64encode(cursor.encode()).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.rstrip('='))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+        try:
+            cursor = json.loads(urlsafe_b64decode(
+                encoded + '=' * (-len(encoded) % 4)))
+            return bool(cursor['r']), list(cursor['p'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
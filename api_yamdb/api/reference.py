@@ -0,0 +1,129 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.relations import (MANY_RELATION_KWARGS, ManyRelatedField,
+                                      SlugRelatedField)
+
+from reviews.models import Category, DataVersion, Genre
+
+CATALOG = 'catalog'
+
+
+class ReferenceSnapshot:
+    """
+    Копия маленькой справочной таблицы в памяти процесса. Версия
+    каталога хранится в базе (DataVersion) и сдвигается в одной
+    транзакции с изменением жанров и категорий. Снимок сверяет её не
+    чаще раза в REFERENCE_CHECK_INTERVAL секунд, поэтому другие процессы
+    видят изменения не позже чем через этот интервал; свой процесс
+    перечитывает снимок сразу после фиксации. Версия и строки читаются
+    из основной базы, а не из реплики.
+    """
+
+    def __init__(self, model, slug_field='slug'):
+        self.model = model
+        self.slug_field = slug_field
+        self.state = None
+        self.checked_until = 0
+
+    def reset(self):
+        self.checked_until = 0
+
+    def load(self):
+        state = self.state
+        now = time.monotonic()
+        if state is not None and now < self.checked_until:
+            return state
+        version = DataVersion.objects.using(DEFAULT_DB_ALIAS).current(
+            CATALOG)
+        if state is None or state[0] != version:
+            objects = tuple(self.model.objects.using(DEFAULT_DB_ALIAS))
+            state = (version, objects, {
+                getattr(obj, self.slug_field): obj for obj in objects
+            })
+            self.state = state
+        self.checked_until = now + settings.REFERENCE_CHECK_INTERVAL
+        return state
+
+    def all(self):
+        return self.load()[1]
+
+    def get_many(self, slugs):
+        """
+        Слаги, которых нет в снимке, один раз ищутся в базе: снимок
+        другого процесса мог ещё не увидеть новый жанр или категорию.
+        """
+        by_slug = self.load()[2]
+        found = {slug: by_slug[slug] for slug in slugs if slug in by_slug}
+        missing = set(slugs) - set(found)
+        if missing:
+            fetched = {
+                getattr(obj, self.slug_field): obj
+                for obj in self.model.objects.using(DEFAULT_DB_ALIAS).filter(
+                    **{f'{self.slug_field}__in': missing})
+            }
+            if fetched:
+                found.update(fetched)
+                self.reset()
+        return found
+
+    def search(self, terms, field='name'):
+        terms = [term.lower() for term in terms]
+        return [
+            obj for obj in self.all()
+            if all(term in getattr(obj, field).lower() for term in terms)
+        ]
+
+
+genres = ReferenceSnapshot(Genre)
+categories = ReferenceSnapshot(Category)
+
+
+def invalidate_snapshots():
+    """Сдвигает версию каталога; снимки процесса сверятся с ней сразу."""
+    DataVersion.objects.bump(CATALOG)
+    transaction.on_commit(lambda: (genres.reset(), categories.reset()))
+
+
+class ReferenceManyRelatedField(ManyRelatedField):
+    """Разрешает все слаги списка одним обращением к снимку."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.to_internal_value_many(data)
+
+
+class ReferenceSlugRelatedField(SlugRelatedField):
+    """SlugRelatedField, который ищет объекты в снимке, а не в базе."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ReferenceManyRelatedField(**list_kwargs)
+
+    def __init__(self, snapshot, **kwargs):
+        self.snapshot = snapshot
+        kwargs.setdefault('slug_field', snapshot.slug_field)
+        kwargs.setdefault('queryset', snapshot.model.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return self.to_internal_value_many((data,))[0]
+
+    def to_internal_value_many(self, data):
+        for value in data:
+            if not isinstance(value, str):
+                self.fail('invalid')
+        found = self.snapshot.get_many(data)
+        for value in data:
+            if value not in found:
+                self.fail('does_not_exist', slug_name=self.slug_field,
+                          value=value)
+        return [found[value] for value in data]
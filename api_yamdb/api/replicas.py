@@ -0,0 +1,109 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from reviews.models import DataVersion
+
+PIN_COOKIE = 'replica_pin'
+SYNC_VERSION = 'replicas:synced'
+
+current_replica = ContextVar('current_replica', default=None)
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтение в реплику, выбранную для текущего запроса
+    (use_replica()), а запись и всё остальное — в основную базу.
+    Реплики не мигрируют: их содержимое копирует sync_replicas().
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def is_pinned(request):
+    """
+    Закрепление хранится в подписанной cookie с меткой времени, поэтому
+    его видит любой процесс, который обслужит следующий запрос.
+    """
+    user = request.user
+    return user.is_authenticated and request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_COOKIE,
+        max_age=settings.REPLICA_PIN_TIMEOUT) == str(user.pk)
+
+
+def pin(response, user):
+    """
+    Закрепляет пользователя за основной базой после записи, чтобы он
+    сразу видел свои изменения, пока реплики их не получили.
+    """
+    response.set_signed_cookie(
+        PIN_COOKIE, user.pk, salt=PIN_COOKIE,
+        max_age=settings.REPLICA_PIN_TIMEOUT, httponly=True,
+        samesite='Lax')
+
+
+def use_replica(request):
+    """
+    Выбирает реплику для чтения до конца запроса. Возвращает токен
+    для release().
+    """
+    alias = None
+    if settings.DATABASE_REPLICAS and not is_pinned(request):
+        alias = random.choice(settings.DATABASE_REPLICAS)
+    return current_replica.set(alias)
+
+
+def release(token):
+    current_replica.reset(token)
+
+
+def get_synced(alias):
+    """
+    Версия основной базы, до которой свежа реплика. Метка хранится в
+    самой реплике (DataVersion), поэтому её видят все процессы; у ещё
+    не скопированной реплики метки нет.
+    """
+    try:
+        return DataVersion.objects.using(alias).current(SYNC_VERSION)
+    except DatabaseError:
+        return 0
+
+
+def require(version):
+    """
+    Переводит чтение запроса на основную базу, если реплика снята
+    раньше версии данных: иначе устаревший ответ попал бы в кеш или
+    получил бы ETag новой версии.
+    """
+    alias = current_replica.get()
+    if alias is not None and get_synced(alias) < version:
+        current_replica.set(None)
+
+
+def sync_replicas():
+    """
+    Копирует основную базу SQLite в реплики через backup API. Перед
+    копией в основной базе сдвигается версия SYNC_VERSION: копия уносит
+    её с собой как версию, до которой реплика свежая.
+    """
+    source = connections[DEFAULT_DB_ALIAS]
+    for alias in settings.DATABASE_REPLICAS:
+        DataVersion.objects.using(DEFAULT_DB_ALIAS).bump(SYNC_VERSION)
+        source.ensure_connection()
+        target = connections[alias]
+        target.ensure_connection()
+        source.connection.backup(target.connection)
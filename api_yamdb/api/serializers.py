@@ -1,12 +1,14 @@
+from django.db import connection, transaction
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 from rest_framework.validators import UniqueTogetherValidator
 
-from reviews.models import (Category, Comment, Genre,
+from reviews.models import (Category, Comment, Genre, GenreTitle,
                             Review, Title, User)
 from reviews.validators import (validate_genre_field, validate_name,
                                 validate_year_field)
-from .utils import EMAIL_LENGTH, USERNAME_LENGTH
+from .reference import ReferenceSlugRelatedField, categories, genres
+from .utils import BULK_BATCH_SIZE, EMAIL_LENGTH, USERNAME_LENGTH
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -24,6 +26,14 @@ class UserSerializer(serializers.ModelSerializer):
     def validate_username(self, value):
         return validate_name(value)
 
+    def update(self, instance, validated_data):
+        """Записывает только переданные поля, а не всю строку."""
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
+        return instance
+
 
 class MeSerializer(UserSerializer):
     class Meta(UserSerializer.Meta):
@@ -67,18 +77,74 @@ class TitleRetrieveListSerializer(serializers.ModelSerializer):
             'id', 'name', 'year', 'rating', 'description', 'genre', 'category')
 
 
+class TitleListSerializer(serializers.ListSerializer):
+    """
+    Массовая запись произведений: произведения и связи с жанрами
+    вставляются через bulk_create в одной транзакции. Сигналы моделей
+    при этом не срабатывают, кеш сбрасывает представление.
+    """
+
+    def create(self, validated_data):
+        titles = [Title(**{
+            field: value for field, value in item.items() if field != 'genre'
+        }) for item in validated_data]
+        with transaction.atomic():
+            Title.objects.bulk_create(titles, batch_size=BULK_BATCH_SIZE)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                self.assign_pks(titles)
+            self.save_genres(titles, validated_data)
+        return titles
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for title, item in zip(instances, validated_data):
+            for field, value in item.items():
+                if field != 'genre':
+                    setattr(title, field, value)
+                    fields.add(field)
+        with transaction.atomic():
+            if fields:
+                Title.objects.bulk_update(instances, fields,
+                                          batch_size=BULK_BATCH_SIZE)
+            self.save_genres(instances, validated_data)
+        return instances
+
+    def assign_pks(self, titles):
+        """
+        SQLite до Django 4 не возвращает ключи из bulk_create. Запись
+        блокирует базу до конца транзакции, поэтому вставленные строки —
+        это последние по возрастанию ключа.
+        """
+        pks = Title.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:len(titles)]
+        for title, pk in zip(titles, reversed(pks)):
+            title.pk = pk
+
+    def save_genres(self, titles, validated_data):
+        changed = [
+            (title, item['genre']) for title, item in zip(
+                titles, validated_data) if 'genre' in item
+        ]
+        GenreTitle.objects.filter(
+            title__in=[title for title, _ in changed]).delete()
+        GenreTitle.objects.bulk_create(
+            [GenreTitle(title=title, genre=genre)
+             for title, genres in changed
+             for genre in dict.fromkeys(genres)],
+            batch_size=BULK_BATCH_SIZE
+        )
+
+
 class TitleCreateSerializer(serializers.ModelSerializer):
-    category = SlugRelatedField(slug_field='slug',
-                                queryset=Category.objects.all())
-    genre = SlugRelatedField(slug_field='slug',
-                             queryset=Genre.objects.all(),
-                             many=True)
+    category = ReferenceSlugRelatedField(categories)
+    genre = ReferenceSlugRelatedField(genres, many=True)
     rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
         fields = (
             'id', 'name', 'year', 'rating', 'description', 'genre', 'category')
+        list_serializer_class = TitleListSerializer
 
     def validate_year(self, value):
         return validate_year_field(value)
@@ -101,16 +167,6 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        if self.context['request'].method == 'POST' and (
-                Review.objects.select_related('author', 'title').filter(
-                    title_id=self.context['view'].kwargs.get('title_id'),
-                    author=self.context['request'].user).exists()):
-            raise serializers.ValidationError(
-                "Нельзя оставить отзыв к одному произведению дважды."
-            )
-        return data
-
 
 class CommentSerializer(serializers.ModelSerializer):
     author = SlugRelatedField(
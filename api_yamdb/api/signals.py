@@ -0,0 +1,74 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from .cache import (invalidate_authors, invalidate_catalog,
+                    invalidate_comments, invalidate_reviews,
+                    invalidate_title, invalidate_user)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title_cache(sender, instance, **kwargs):
+    invalidate_title(instance.pk)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_related_title_cache(sender, instance, **kwargs):
+    invalidate_title(instance.title_id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres_cache(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_title(instance.pk)
+    elif pk_set:
+        invalidate_title(*pk_set)
+    else:
+        invalidate_catalog()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_collection(sender, instance, **kwargs):
+    invalidate_reviews(instance.title_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_collection(sender, instance, **kwargs):
+    invalidate_comments(instance.review_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user(sender, instance, **kwargs):
+    """
+    Имя автора выводится в отзывах и комментариях, а имя, роль и флаги
+    пользователя записаны в выданных ему токенах. Изменённые поля
+    находит reviews.signals.bump_claims_version.
+    """
+    changed = getattr(instance, '_changed_token_fields', ())
+    if 'username' in changed:
+        invalidate_authors()
+    if changed:
+        invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
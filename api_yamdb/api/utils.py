@@ -3,8 +3,10 @@ FINAL_NUM = 9999
 GAP = 1
 EMAIL = 'Электронная почта занята'
 USERNAME = 'Имя пользователя занято'
+DUPLICATE_REVIEW = 'Нельзя оставить отзыв к одному произведению дважды.'
 EMAIL_LENGTH = 254
 USERNAME_LENGTH = 150
 NAME_LENGTH = 256
 SLUG_LENGTH = 50
 CODE_LENGTH = 4
+BULK_BATCH_SIZE = 500
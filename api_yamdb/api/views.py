@@ -1,38 +1,46 @@
 import random
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import Category, Genre, Review, Title, User
-from .filters import TitleFilter
-from .mixins import CreateListDestroyViewSet
+from reviews.models import (Category, Comment, ConfirmationCode, Genre, Review,
+                            Title, User)
+from .authentication import ClaimsAccessToken
+from .filters import FullTextSearchFilter, TitleFilter, UsernameSearchFilter
+from . import cache as response_cache
+from .mail import queue_mail
+from .mixins import (CachedListRetrieveMixin, ConditionalGetMixin,
+                     CreateListDestroyViewSet, NestedResourceMixin,
+                     ReferenceListMixin, ReplicaReadMixin)
+from .pagination import KeysetPagination
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsAuthorOrAdminOrModeratorOrReadOnly)
+from .reference import categories, genres
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, MeSerializer,
                           MyTokenObtainSerializer, ReviewSerializer,
                           TitleCreateSerializer, TitleRetrieveListSerializer,
                           UserRegistrationSerializer, UserSerializer)
-from .utils import EMAIL, FINAL_NUM, GAP, START_NUM, USERNAME
+from .utils import (DUPLICATE_REVIEW, EMAIL, FINAL_NUM, GAP, START_NUM,
+                    USERNAME)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated, IsAdmin,)
     lookup_field = 'username'
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (UsernameSearchFilter,)
     search_fields = ('username',)
 
     @action(methods=['GET', 'PATCH'],
@@ -40,7 +48,7 @@ class UserViewSet(viewsets.ModelViewSet):
             permission_classes=(IsAuthenticated,),
             url_path='me')
     def me(self, request):
-        user = request.user
+        user = get_object_or_404(User, pk=request.user.pk)
         serializer = UserSerializer(user)
         if request.method == 'PATCH':
             serializer = MeSerializer(
@@ -53,22 +61,31 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(ReferenceListMixin, CreateListDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    reference = genres
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(ReferenceListMixin, CreateListDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    reference = categories
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).all()
+class TitleViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                   CachedListRetrieveMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.with_rating().select_related(
+        'category').prefetch_related('genre')
     serializer_class = TitleCreateSerializer
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter,)
-    ordering = ['year']
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter,
+                       FullTextSearchFilter)
+    ordering = ['year', '-name']
+    fts_table = 'reviews_title_fts'
+    fts_weights = (10.0, 1.0)
+    fts_rating_field = 'rating'
     filterset_class = TitleFilter
     filterset_fields = ('category', 'genre', 'name', 'year')
 
@@ -77,35 +94,126 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleRetrieveListSerializer
         return TitleCreateSerializer
 
+    @action(methods=['POST', 'PATCH'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError('Ожидается непустой список произведений.')
+        if len(items) > settings.TITLE_BULK_MAX_ITEMS:
+            raise ValidationError(
+                'Можно передать не больше '
+                f'{settings.TITLE_BULK_MAX_ITEMS} произведений.')
+        instances = None
+        if request.method == 'PATCH':
+            instances = self.get_bulk_instances(items)
+        serializer = TitleCreateSerializer(
+            instances, data=items, many=True,
+            partial=instances is not None
+        )
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save()
+        pks = [title.pk for title in titles]
+        response_cache.invalidate_title(*pks)
+        saved = self.get_queryset().in_bulk(pks)
+        return Response(
+            TitleRetrieveListSerializer(
+                [saved[pk] for pk in pks], many=True).data,
+            status=(status.HTTP_201_CREATED if instances is None
+                    else status.HTTP_200_OK)
+        )
+
+    def get_bulk_instances(self, items):
+        pks = [item.get('id') if isinstance(item, dict) else None
+               for item in items]
+        pks = [pk if isinstance(pk, int) else None for pk in pks]
+        found = Title.objects.in_bulk(
+            [pk for pk in pks if pk is not None])
+        errors = []
+        seen = set()
+        for pk in pks:
+            if pk not in found:
+                errors.append({'id': ['Произведение не найдено.']})
+            elif pk in seen:
+                errors.append({'id': ['Произведение передано дважды.']})
+            else:
+                errors.append({})
+            seen.add(pk)
+        if any(errors):
+            raise ValidationError(errors)
+        return [found[pk] for pk in pks]
+
+    def get_validator_keys(self):
+        if self.action == 'list':
+            return (response_cache.CATALOG_VERSION,
+                    response_cache.LIST_VERSION)
+        return (response_cache.CATALOG_VERSION,
+                response_cache.DETAIL_VERSION.format(self.kwargs['pk']))
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                    NestedResourceMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorOrAdminOrModeratorOrReadOnly,)
-
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    pagination_class = KeysetPagination
+    filter_backends = (FullTextSearchFilter,)
+    fts_table = 'reviews_review_fts'
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
+    parent_count_field = 'rating_count'
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        """
+        Повторный отзыв отсекает ограничение unique_review, а не
+        предварительный запрос: так не бывает гонки между проверкой и
+        вставкой.
+        """
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user,
+                                title_id=self.kwargs['title_id'])
+        except IntegrityError:
+            if not Review.objects.filter(
+                    author=self.request.user,
+                    title_id=self.kwargs['title_id']).exists():
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW]})
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs['title_id']).select_related('author')
+
+    def get_validator_keys(self):
+        return (
+            response_cache.REVIEWS_VERSION.format(self.kwargs['title_id']),
+            response_cache.AUTHORS_VERSION
+        )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                     NestedResourceMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorOrAdminOrModeratorOrReadOnly,)
-
-    def get_review(self):
-        return get_object_or_404(Review,
-                                 id=self.kwargs.get('review_id'),
-                                 title_id=self.kwargs.get('title_id'))
+    pagination_class = KeysetPagination
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    parent_count_field = 'comment_count'
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user,
+                        review_id=self.kwargs['review_id'])
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id']
+        ).select_related('author')
+
+    def get_validator_keys(self):
+        return (
+            response_cache.COMMENTS_VERSION.format(self.kwargs['review_id']),
+            response_cache.AUTHORS_VERSION
+        )
 
 
 class UserRegistrationView(APIView):
@@ -115,12 +223,10 @@ class UserRegistrationView(APIView):
                                     GAP))
 
     def send_email(self, email, confirmation_code):
-        send_mail(
+        queue_mail(
             'confirmation_code',
             message=confirmation_code,
-            from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[email],
-            fail_silently=False,
         )
 
     def post(self, request):
@@ -141,8 +247,7 @@ class UserRegistrationView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         confirmation_code = self.get_confirmation_code()
-        user.confirmation_code = confirmation_code
-        user.save()
+        ConfirmationCode.objects.issue(user, confirmation_code)
         self.send_email(email, confirmation_code)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -154,11 +259,8 @@ class MyTokenObtainApiView(APIView):
         username = serializer.validated_data['username']
         confirmation_code = serializer.validated_data['confirmation_code']
         user = get_object_or_404(User, username=username)
-        if (confirmation_code == user.confirmation_code
-                and confirmation_code != 0):
-            token = str(AccessToken.for_user(user))
-            user.confirmation_code = 0
-            user.save()
+        if ConfirmationCode.objects.consume(user, confirmation_code):
+            token = str(ClaimsAccessToken.for_user(user))
             return Response({'token': token}, status=status.HTTP_201_CREATED)
         return Response(
             {'confirmation_code: Неверный пин-код'},
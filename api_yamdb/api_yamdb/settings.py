@@ -24,8 +24,10 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
-    'api',
+    # reviews before api: rating and counter receivers run before the
+    # cache invalidation receivers of the same signal
     'reviews',
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -61,13 +63,89 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# Writers of one process take turns in a FIFO queue instead of competing
+# in SQLite's busy handler: `timeout` bounds the wait in seconds and
+# `max_waiting` the queue length, beyond which writes fail fast with 503
+
+SQLITE_WRITE_QUEUE = {
+    'timeout': 5,
+    'max_waiting': 64,
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'api_yamdb.sqlite3',
+        'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': {
+            'write_queue': SQLITE_WRITE_QUEUE,
+        },
+    }
+}
+
+# DB_PROFILE=production: WAL, connection-init pragmas and persistent,
+# health-checked connections
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+if os.getenv('DB_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'OPTIONS': {
+            'pragmas': SQLITE_PRODUCTION_PRAGMAS,
+            'health_checks': True,
+            'write_queue': SQLITE_WRITE_QUEUE,
+        },
+    })
+
+# Read replicas: DB_REPLICAS lists SQLite files that `manage.py syncreplicas`
+# copies the primary database into. Safe-method API reads go to a replica,
+# writers stay on the primary for REPLICA_PIN_TIMEOUT seconds.
+
+DATABASE_REPLICAS = []
+for index, name in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+REPLICA_PIN_TIMEOUT = 10
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yamdb'),
     }
 }
 
+TITLE_CACHE_ALIAS = 'default'
+TITLE_CACHE_TIMEOUT = 300
+
+# Seconds between checks of the catalog version (stored in the database)
+# by the per-process genre and category snapshots
+
+REFERENCE_CHECK_INTERVAL = 2
+
+# Maximum number of titles accepted by /api/v1/titles/bulk/ in one request
+
+TITLE_BULK_MAX_ITEMS = 10000
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -91,16 +169,40 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 DEFAULT_FROM_EMAIL = 'admin@yamdb.ru'
 
+CONFIRMATION_CODE_LIFETIME = timedelta(hours=1)
+
+# Outbound mail queue, delivered by `manage.py sendqueuedmail`
+
+EMAIL_QUEUE_ENABLED = os.getenv('EMAIL_QUEUE_ENABLED', 'true') == 'true'
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 30
+EMAIL_QUEUE_LEASE = 300
+# Sent and abandoned mails are purged by sendqueuedmail after this period
+EMAIL_QUEUE_RETENTION = timedelta(days=7)
+
 # SIMPLE_JWT settings
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
+    # Role changes reach tokens through User.claims_version; a short
+    # lifetime bounds how long a stolen token stays usable.
+    'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
     'BLACKLIST_AFTER_ROTATION': False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
+    'AUTH_TOKEN_CLASSES': ('api.authentication.ClaimsAccessToken',),
 }
 
+# Seconds to keep a user's role and flags cached after a DB lookup
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Seconds a cached User.claims_version may lag behind the database
+# before a demotion revokes the claims of already issued tokens
+
+AUTH_CLAIMS_VERSION_TIMEOUT = 5
+
 # Internationalization
 
 LANGUAGE_CODE = 'ru'
@@ -127,9 +229,20 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+
+    'EXCEPTION_HANDLER': 'api.exceptions.exception_handler',
 }
+
+# Keyset pagination settings
+
+PAGINATION_MAX_PAGE_SIZE = 100
+PAGINATION_INCLUDE_COUNT = True
+
+# Full-text search: weight of the title rating added to the bm25 relevance
+
+SEARCH_RATING_WEIGHT = 0.1
@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+from .writequeue import get_queue
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class SerializedCursorWrapper(base.SQLiteCursorWrapper):
+    """Ставит в очередь записи одиночные изменения вне транзакции."""
+
+    def execute(self, query, params=None):
+        with self.database.autocommit_write(query):
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        with self.database.autocommit_write(query):
+            return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite, в котором транзакции atomic() начинаются с BEGIN IMMEDIATE.
+    Блокировка записи берётся в начале транзакции, и параллельные
+    записи ждут её в пределах таймаута. При обычном BEGIN блокировка
+    повышается посреди транзакции, и SQLite сразу отвечает
+    «database is locked», чтобы избежать взаимной блокировки.
+
+    Дополнительные ключи OPTIONS: `pragmas` — PRAGMA, которые
+    выполняются при открытии соединения, `health_checks` — проверка
+    постоянного соединения (CONN_MAX_AGE) перед повторным
+    использованием, и `write_queue` — параметры очереди писателей
+    процесса (`timeout`, `max_waiting`): транзакции и одиночные
+    изменения ждут своей очереди в процессе, а не в busy_timeout.
+    """
+
+    custom_options = ('pragmas', 'health_checks', 'write_queue')
+    write_lock_held = False
+
+    @property
+    def pragmas(self):
+        return self.settings_dict['OPTIONS'].get('pragmas', {})
+
+    @property
+    def health_checks(self):
+        return self.settings_dict['OPTIONS'].get('health_checks', False)
+
+    @property
+    def write_queue(self):
+        return self.settings_dict['OPTIONS'].get('write_queue')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in self.custom_options:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SerializedCursorWrapper)
+        cursor.database = self
+        return cursor
+
+    def acquire_write_lock(self):
+        if self.write_queue is None or self.write_lock_held:
+            return
+        get_queue(self.settings_dict['NAME']).acquire(**self.write_queue)
+        self.write_lock_held = True
+
+    def release_write_lock(self):
+        if self.write_lock_held:
+            self.write_lock_held = False
+            get_queue(self.settings_dict['NAME']).release()
+
+    @contextmanager
+    def autocommit_write(self, query):
+        if (self.write_queue is None or self.write_lock_held
+                or self.connection.in_transaction
+                or not query.lstrip()[:7].upper().startswith(
+                    WRITE_STATEMENTS)):
+            yield
+            return
+        self.acquire_write_lock()
+        try:
+            yield
+        finally:
+            self.release_write_lock()
+
+    def _start_transaction_under_autocommit(self):
+        self.acquire_write_lock()
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self.release_write_lock()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            if self.connection is None or not self.connection.in_transaction:
+                self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_write_lock()
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if (self.health_checks and self.connection is not None
+                and not self.in_atomic_block and not self.is_usable()):
+            self.close()
@@ -0,0 +1,63 @@
+import threading
+from collections import deque
+
+
+class WriteQueueError(Exception):
+    """Запись не дождалась своей очереди."""
+
+
+class WriteQueueFull(WriteQueueError):
+    pass
+
+
+class WriteQueueTimeout(WriteQueueError):
+    pass
+
+
+class WriteQueue:
+    """
+    Очередь писателей в одну базу внутри процесса. Право записи
+    передаётся следующему ожидающему потоку по порядку прихода, поэтому
+    ожидание растёт линейно с длиной очереди, а не зависит от того,
+    какой поток раньше проснётся в цикле busy_timeout SQLite.
+    """
+
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.waiters = deque()
+        self.locked = False
+
+    def acquire(self, timeout=None, max_waiting=None):
+        with self.mutex:
+            if not self.locked and not self.waiters:
+                self.locked = True
+                return
+            if max_waiting is not None and len(self.waiters) >= max_waiting:
+                raise WriteQueueFull(
+                    f'В очереди на запись уже {len(self.waiters)} потоков.')
+            turn = threading.Event()
+            self.waiters.append(turn)
+        if turn.wait(timeout):
+            return
+        with self.mutex:
+            if turn.is_set():
+                return
+            self.waiters.remove(turn)
+        raise WriteQueueTimeout(
+            f'Очередь на запись не подошла за {timeout} с.')
+
+    def release(self):
+        with self.mutex:
+            if self.waiters:
+                self.waiters.popleft().set()
+            else:
+                self.locked = False
+
+
+queues = {}
+queues_lock = threading.Lock()
+
+
+def get_queue(name):
+    with queues_lock:
+        return queues.setdefault(str(name), WriteQueue())
@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (Category, Comment, Genre, OutgoingMail, Review, Title,
+                     User)
 
 
 class GenreInline(admin.TabularInline):
@@ -73,6 +74,21 @@ class UserAdmin(BaseUserAdmin):
     empty_value_display = '-пусто-'
 
 
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'created_at',
+        'sent_at',
+        'attempts',
+        'send_after'
+    )
+    list_filter = ('sent_at',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Review)
 admin.site.register(Comment)
 admin.site.unregister(Group)
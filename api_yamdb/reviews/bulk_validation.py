@@ -0,0 +1,155 @@
+"""
+Проверка загружаемых строк целыми колонками, без full_clean() на каждую
+строку. Правила берутся из валидаторов полей моделей, внешние ключи и
+уникальность пар (автор, произведение) сверяются с заранее загруженными
+множествами. Значения, которые не удалось привести к типу поля, приходят
+в пачке как InvalidValue и попадают в отчёт с кодом invalid.
+"""
+import datetime as dt
+
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+from .models import Review
+from .validators import (FORBIDDEN_USERNAME, get_invalid_name_chars,
+                         validate_name, validate_year_field)
+
+
+class InvalidValue:
+    """Значение из файла, которое не приводится к типу поля."""
+
+    def __init__(self, value, message):
+        self.value = value
+        self.message = message
+
+
+def error(row, column, code, value, message):
+    return {
+        'row': row,
+        'column': column,
+        'code': code,
+        'value': value,
+        'message': message,
+    }
+
+
+def check_conversion(column, values):
+    for index, value in enumerate(values):
+        if isinstance(value, InvalidValue):
+            yield index, error(index, column, 'invalid', value.value,
+                               value.message)
+
+
+def check_range(column, values, validators):
+    low = max((validator.limit_value for validator in validators
+               if isinstance(validator, MinValueValidator)), default=None)
+    high = min((validator.limit_value for validator in validators
+                if isinstance(validator, MaxValueValidator)), default=None)
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        if low is not None and value < low or (
+                high is not None and value > high):
+            yield index, error(index, column, 'out_of_range', value,
+                               f'Значение должно быть от {low} до {high}.')
+
+
+def check_year(column, values):
+    current_year = dt.date.today().year
+    for index, value in enumerate(values):
+        if value is not None and value > current_year:
+            yield index, error(
+                index, column, 'year_in_future', value,
+                'Год выпуска произведения не может быть больше текущего.')
+
+
+def check_username(column, values):
+    for index, value in enumerate(values):
+        if value == FORBIDDEN_USERNAME or get_invalid_name_chars(value):
+            yield index, error(index, column, 'invalid_username', value,
+                               'Недопустимое имя пользователя.')
+
+
+class BatchValidator:
+    """
+    Хранит множества известных первичных ключей и пар отзывов между
+    пачками. Ключи из базы загружаются один раз при первом обращении,
+    ключи прошедших проверку строк добавляются по ходу загрузки.
+    """
+
+    def __init__(self):
+        self.known_ids = {}
+        self.review_pairs = None
+
+    def get_known_ids(self, model):
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True).iterator())
+        return self.known_ids[model]
+
+    def get_review_pairs(self):
+        if self.review_pairs is None:
+            self.review_pairs = {
+                (author_id, title_id): pk
+                for pk, author_id, title_id in Review.objects.values_list(
+                    'pk', 'author_id', 'title_id').iterator()
+            }
+        return self.review_pairs
+
+    def validate(self, model, batch):
+        """
+        Возвращает ошибки пачки; `row` в них — номер строки в пачке.
+        Ключи корректных строк запоминаются для следующих таблиц.
+        """
+        errors = {}
+        for column in batch[0]:
+            field = model._meta.get_field(column)
+            values = [data[column] for data in batch]
+            for index, row_error in self.check_column(field, values):
+                errors.setdefault(index, []).append(row_error)
+        if model is Review:
+            for index, row_error in self.check_review_pairs(batch, errors):
+                errors.setdefault(index, []).append(row_error)
+
+        pk = model._meta.pk.attname
+        known = self.get_known_ids(model)
+        known.update(
+            data[pk] for index, data in enumerate(batch)
+            if index not in errors
+        )
+        return [row_error for index in sorted(errors)
+                for row_error in errors[index]]
+
+    def check_column(self, field, values):
+        column = field.attname
+        invalid = list(check_conversion(column, values))
+        if invalid:
+            yield from invalid
+            values = [None if isinstance(value, InvalidValue) else value
+                      for value in values]
+        if field.is_relation and field.many_to_one:
+            known = self.get_known_ids(field.related_model)
+            for index, value in enumerate(values):
+                if value is not None and value not in known:
+                    yield index, error(
+                        index, column, 'missing_foreign_key', value,
+                        f'Нет объекта {field.related_model.__name__} '
+                        f'с id={value}.')
+            return
+        yield from check_range(column, values, field.validators)
+        if validate_year_field in field.validators:
+            yield from check_year(column, values)
+        if validate_name in field.validators:
+            yield from check_username(column, values)
+
+    def check_review_pairs(self, batch, errors):
+        pairs = self.get_review_pairs()
+        for index, data in enumerate(batch):
+            pair = (data['author_id'], data['title_id'])
+            owner = pairs.get(pair)
+            if owner is not None and owner != data['id']:
+                yield index, error(
+                    index, 'author_id,title_id', 'duplicate_review',
+                    list(pair),
+                    'Нельзя оставить отзыв к одному произведению дважды.')
+            elif index not in errors:
+                pairs[pair] = data['id']
@@ -0,0 +1,292 @@
+import datetime as dt
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                          WSGIRequestHandler)
+from django.db import connections
+from django.db.models import Max, Min
+from django.test.utils import override_settings
+
+from reviews.models import (Category, Comment, ConfirmationCode, Genre,
+                            Review, Title, User)
+from reviews.synthetic import generate_dataset
+
+ENDPOINTS = ('titles', 'title', 'reviews', 'comments', 'signup', 'token')
+QUERY_COUNT_HEADER = 'X-Query-Count'
+TOKEN_CODE = '1000'
+SAMPLE_CHUNK = 500
+
+
+class QueryCountingApp:
+    """
+    WSGI-обёртка, которая считает запросы к базе во время обработки
+    запроса и отдаёт их число в заголовке X-Query-Count.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        def counted_start_response(status, headers, exc_info=None):
+            headers.append((QUERY_COUNT_HEADER, str(queries)))
+            return start_response(status, headers, exc_info)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            return self.app(environ, counted_start_response)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def summarize(latencies, statuses, queries, elapsed):
+    ordered = sorted(latencies)
+    percentiles = (statistics.quantiles(ordered, n=100, method='inclusive')
+                   if len(ordered) > 1 else ordered * 99)
+    return {
+        'requests': len(latencies),
+        'errors': sum(status >= 400 for status in statuses),
+        'statuses': {
+            str(status): statuses.count(status) for status in set(statuses)
+        },
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentiles[49], 2),
+        'p95_ms': round(percentiles[94], 2),
+        'p99_ms': round(percentiles[98], 2),
+        'max_ms': round(ordered[-1], 2),
+        'queries_mean': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест API: при необходимости заполняет базу '
+            'синтетическими данными, запускает WSGI-приложение на '
+            'локальном порту и замеряет пропускную способность, задержки '
+            'и число запросов к базе для каждого эндпоинта. Результаты '
+            'сохраняются в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generate', action='store_true',
+                            help='Сначала заполнить базу данными.')
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--titles', type=int, default=20000)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--reviews', type=int, default=200000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='Показатель степенного закона отзывов.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS,
+                            default=list(ENDPOINTS))
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на эндпоинт.')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Одновременных клиентов.')
+        parser.add_argument('--output', type=Path, default=None,
+                            help='Файл результатов JSON.')
+        parser.add_argument('--baseline', type=Path, default=None,
+                            help='Результаты прошлого запуска для '
+                                 'сравнения.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                'Число запросов и клиентов должно быть больше нуля.')
+        self.rng = random.Random(options['seed'])
+        if options['generate']:
+            if Review.objects.exists():
+                raise CommandError(
+                    'В базе уже есть отзывы: для генерации укажите пустую '
+                    'базу через DB_NAME.')
+            started = time.perf_counter()
+            created = generate_dataset(
+                options['users'], options['titles'], options['genres'],
+                options['categories'], options['reviews'],
+                options['comments'], alpha=options['alpha'],
+                seed=options['seed'])
+            self.stdout.write(
+                f'Данные созданы за {time.perf_counter() - started:.1f} с: '
+                + ', '.join(f'{name} {count}'
+                            for name, count in created.items()))
+        if not Title.objects.exists():
+            raise CommandError(
+                'В базе нет произведений: запустите команду с --generate.')
+
+        results = {
+            'started_at': dt.datetime.now(dt.timezone.utc).isoformat(),
+            'database': str(settings.DATABASES['default']['NAME']),
+            'dataset': {
+                model.__name__: model.objects.count()
+                for model in (User, Genre, Category, Title, Review, Comment)
+            },
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'endpoints': {},
+        }
+        with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+            server.set_app(QueryCountingApp(WSGIHandler()))
+            thread = threading.Thread(target=server.serve_forever,
+                                      daemon=True)
+            thread.start()
+            base_url = f'http://127.0.0.1:{server.server_port}'
+            try:
+                for endpoint in options['endpoints']:
+                    targets = getattr(self, f'targets_{endpoint}')(
+                        options['requests'])
+                    results['endpoints'][endpoint] = self.run_load(
+                        base_url, targets, options['concurrency'])
+                    self.report(endpoint, results['endpoints'][endpoint])
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        output = options['output'] or (
+            Path(settings.BASE_DIR) / 'benchmarks'
+            / f'benchapi-{dt.datetime.now():%Y%m%d-%H%M%S}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, ensure_ascii=False, indent=2))
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {output}'))
+        if options['baseline']:
+            self.compare(results, json.loads(options['baseline'].read_text()))
+
+    def run_load(self, base_url, targets, concurrency):
+        def send(target):
+            method, url, data = target
+            request = Request(
+                base_url + url, method=method,
+                data=None if data is None else json.dumps(data).encode(),
+                headers={'Content-Type': 'application/json'})
+            started = time.perf_counter()
+            try:
+                with urlopen(request) as response:
+                    response.read()
+            except HTTPError as error:
+                response = error
+                error.read()
+            latency = (time.perf_counter() - started) * 1000
+            return (latency, response.status,
+                    int(response.headers.get(QUERY_COUNT_HEADER, 0)))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            samples = list(executor.map(send, targets))
+        elapsed = time.perf_counter() - started
+        latencies, statuses, queries = zip(*samples)
+        return summarize(latencies, list(statuses), queries, elapsed)
+
+    def report(self, endpoint, result):
+        self.stdout.write(
+            f'{endpoint:<10} {result["throughput"]:>8.1f} req/s  '
+            f'p50 {result["p50_ms"]:>8.2f}  p95 {result["p95_ms"]:>8.2f}  '
+            f'p99 {result["p99_ms"]:>8.2f} мс  '
+            f'запросов к БД {result["queries_mean"]:>6.2f}  '
+            f'ошибок {result["errors"]}')
+
+    def compare(self, results, baseline):
+        self.stdout.write('Изменение p95 и пропускной способности:')
+        for endpoint, result in results['endpoints'].items():
+            before = baseline['endpoints'].get(endpoint)
+            if before is None:
+                continue
+            self.stdout.write(
+                f'{endpoint:<10} p95 {before["p95_ms"]:.2f} -> '
+                f'{result["p95_ms"]:.2f} мс, '
+                f'{before["throughput"]:.1f} -> '
+                f'{result["throughput"]:.1f} req/s')
+
+    def sample_titles(self, count):
+        """Произведения выбираются пропорционально числу отзывов."""
+        titles = list(Title.objects.values_list('pk', 'rating_count'))
+        return self.rng.choices(
+            [pk for pk, _ in titles],
+            weights=[reviews + 1 for _, reviews in titles], k=count)
+
+    def targets_titles(self, count):
+        return [('GET', '/api/v1/titles/', None)] * count
+
+    def targets_title(self, count):
+        return [('GET', f'/api/v1/titles/{pk}/', None)
+                for pk in self.sample_titles(count)]
+
+    def targets_reviews(self, count):
+        return [('GET', f'/api/v1/titles/{pk}/reviews/', None)
+                for pk in self.sample_titles(count)]
+
+    def targets_comments(self, count):
+        bounds = Review.objects.aggregate(
+            first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            raise CommandError('В базе нет отзывов для комментариев.')
+        candidates = [self.rng.randint(bounds['first'], bounds['last'])
+                      for _ in range(count)]
+        found = {}
+        for offset in range(0, count, SAMPLE_CHUNK):
+            found.update(Review.objects.filter(
+                pk__in=candidates[offset:offset + SAMPLE_CHUNK]
+            ).values_list('pk', 'title_id'))
+        if not found:
+            raise CommandError('Не удалось выбрать отзывы.')
+        reviews = [pk for pk in candidates if pk in found]
+        reviews += self.rng.choices(reviews, k=count - len(reviews))
+        return [
+            ('GET', f'/api/v1/titles/{found[pk]}/reviews/{pk}/comments/',
+             None)
+            for pk in reviews
+        ]
+
+    def get_run_prefix(self):
+        return f'b{self.rng.randrange(36 ** 5):x}'
+
+    def targets_signup(self, count):
+        prefix = self.get_run_prefix()
+        return [
+            ('POST', '/api/v1/auth/signup/', {
+                'username': f'{prefix}s{index}',
+                'email': f'{prefix}s{index}@example.com',
+            })
+            for index in range(count)
+        ]
+
+    def targets_token(self, count):
+        prefix = self.get_run_prefix()
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}t{index}',
+                 email=f'{prefix}t{index}@example.com')
+            for index in range(count)
+        ])
+        for user in User.objects.filter(
+                username__in=[user.username for user in users]):
+            ConfirmationCode.objects.issue(user, TOKEN_CODE)
+        return [
+            ('POST', '/api/v1/auth/token/', {
+                'username': user.username,
+                'confirmation_code': TOKEN_CODE,
+            })
+            for user in users
+        ]
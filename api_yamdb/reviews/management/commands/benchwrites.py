@@ -0,0 +1,129 @@
+import copy
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+
+from api_yamdb.sqlite3.writequeue import WriteQueueError
+
+SCHEMA = (
+    'CREATE TABLE title (id INTEGER PRIMARY KEY, reviews INTEGER)',
+    'CREATE TABLE review (id INTEGER PRIMARY KEY, title_id INTEGER, '
+    'author_id INTEGER, text TEXT, UNIQUE (title_id, author_id))',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, review_id INTEGER, '
+    'text TEXT)',
+    'INSERT INTO title (id, reviews) VALUES (1, 0)',
+)
+MODES = {
+    'busy_timeout': None,
+    'write_queue': settings.SQLITE_WRITE_QUEUE,
+}
+
+
+def percentile(latencies, rank):
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0
+    return statistics.quantiles(latencies, n=100)[rank - 1]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает задержки параллельной записи в SQLite с ожиданием '
+            'в busy_timeout и с очередью писателей процесса.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16,
+                            help='Число пишущих потоков.')
+        parser.add_argument('--writes', type=int, default=50,
+                            help='Отзывов с комментарием на поток.')
+        parser.add_argument('--hold-ms', type=float, default=2.0,
+                            help='Работа внутри транзакции, мс.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"mode":<14}{"ok":>7}{"errors":>8}{"p50":>9}{"p95":>9}'
+            f'{"p99":>9}{"max":>9}{"writes/s":>10}')
+        with tempfile.TemporaryDirectory() as directory:
+            for mode, write_queue in MODES.items():
+                result = self.run_mode(
+                    mode, Path(directory) / f'{mode}.sqlite3', write_queue,
+                    options)
+                self.stdout.write(
+                    f'{mode:<14}{result["ok"]:>7}{result["errors"]:>8}'
+                    + ''.join(f'{result[key]:>9.1f}'
+                              for key in ('p50', 'p95', 'p99', 'max'))
+                    + f'{result["throughput"]:>10.0f}')
+        self.stdout.write('Задержки в мс на одну транзакцию записи.')
+
+    def run_mode(self, mode, path, write_queue, options):
+        alias = f'bench_{mode}'
+        settings_dict = copy.deepcopy(
+            connections[DEFAULT_DB_ALIAS].settings_dict)
+        settings_dict.update({
+            'NAME': str(path),
+            'OPTIONS': {'write_queue': write_queue},
+        })
+        connections.settings[alias] = settings_dict
+        try:
+            with connections[alias].cursor() as cursor:
+                for statement in SCHEMA:
+                    cursor.execute(statement)
+            return self.hammer(alias, options)
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+    def hammer(self, alias, options):
+        latencies = []
+        errors = []
+        barrier = threading.Barrier(options['threads'])
+        hold = options['hold_ms'] / 1000
+
+        def writer(author_id):
+            barrier.wait()
+            for index in range(options['writes']):
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic(using=alias):
+                        cursor = connections[alias].cursor()
+                        cursor.execute(
+                            'INSERT INTO review (title_id, author_id, text) '
+                            'VALUES (%s, %s, %s)',
+                            (index, author_id, 'Текст'))
+                        time.sleep(hold)
+                        cursor.execute(
+                            'UPDATE title SET reviews = reviews + 1 '
+                            'WHERE id = 1')
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute(
+                            'INSERT INTO comment (review_id, text) '
+                            'VALUES (%s, %s)', (index, 'Текст'))
+                except (DatabaseError, WriteQueueError) as error:
+                    errors.append(error)
+                else:
+                    latencies.append(
+                        (time.perf_counter() - started) * 1000)
+            connections[alias].close()
+
+        threads = [threading.Thread(target=writer, args=(author_id,))
+                   for author_id in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'ok': len(latencies),
+            'errors': len(errors),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies, default=0),
+            'throughput': len(latencies) / elapsed,
+        }
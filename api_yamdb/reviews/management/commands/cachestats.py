@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import (get_cache_backend, get_stats, has_shared_stats,
+                       reset_stats)
+
+
+class Command(BaseCommand):
+    help = 'Показывает счётчики попаданий в кеш ответов произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счётчики после вывода.')
+
+    def handle(self, *args, **options):
+        if not has_shared_stats():
+            raise CommandError(
+                f'Кеш {get_cache_backend()} не делит счётчики между '
+                'процессами или увеличивает их не атомарно: команда '
+                'увидела бы не те числа, что у сервера. Задайте '
+                'CACHE_BACKEND с memcached или Redis.')
+        stats = get_stats()
+        for name, value in stats.items():
+            self.stdout.write(f'{name}: {value}')
+        if options['reset']:
+            reset_stats()
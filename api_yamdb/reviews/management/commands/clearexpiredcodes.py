@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import ConfirmationCode
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные коды подтверждения.'
+
+    def handle(self, *args, **options):
+        deleted, _ = ConfirmationCode.objects.expired().delete()
+        self.stdout.write(f'Удалено кодов: {deleted}.')
@@ -0,0 +1,113 @@
+import csv
+import datetime as dt
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .importcsv import NDJSON_SUFFIX, TABLES
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+
+
+def to_csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dt.date, dt.time)):
+        return value.isoformat()
+    return value
+
+
+def to_json_value(value):
+    if isinstance(value, (dt.date, dt.time)):
+        return value.isoformat()
+    return str(value)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает данные в формате static/data: по файлу на модель '
+            'из importcsv.TABLES.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            default=Path(settings.BASE_DIR) / 'export',
+            type=Path,
+            help='Каталог для выгрузки.'
+        )
+        parser.add_argument(
+            '--format',
+            default='csv',
+            choices=FORMATS,
+            help='Формат файлов: csv или ndjson, оба читаются importcsv.'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            default=DEFAULT_CHUNK_SIZE,
+            type=int,
+            help='Количество строк, читаемых из базы за один раз.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер чанка должен быть больше нуля.')
+        output_dir = options['output_dir']
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for model, csv_f in TABLES.items():
+            name = csv_f
+            if options['format'] == 'ndjson':
+                name = Path(csv_f).stem + NDJSON_SUFFIX
+            if options['gzip']:
+                name = f'{name}.gz'
+            self.export_table(model, output_dir / name, options)
+        self.stdout.write(self.style.SUCCESS('Все данные выгружены'))
+
+    def export_table(self, model, path, options):
+        """
+        Строки читаются серверным курсором через iterator(), поэтому
+        расход памяти не зависит от размера таблицы. Файл пишется во
+        временный и переименовывается только после успешной выгрузки.
+        """
+        started = time.monotonic()
+        columns = [field.attname for field in model._meta.concrete_fields]
+        rows = model.objects.order_by('pk').values_list(*columns).iterator(
+            chunk_size=options['chunk_size'])
+        temporary = path.with_name(f'.{path.name}.tmp')
+        opener = gzip.open if options['gzip'] else open
+        count = 0
+        try:
+            with opener(temporary, 'wt', encoding='utf-8',
+                        newline='') as output:
+                if options['format'] == 'csv':
+                    writer = csv.writer(output)
+                    writer.writerow(columns)
+                    for row in rows:
+                        writer.writerow(to_csv_value(value) for value in row)
+                        count += 1
+                else:
+                    for row in rows:
+                        output.write(json.dumps(
+                            dict(zip(columns, row)), ensure_ascii=False,
+                            default=to_json_value) + '\n')
+                        count += 1
+            os.replace(temporary, path)
+        except OSError as error:
+            raise CommandError(
+                f'Не удалось записать {path}: {error}') from error
+        finally:
+            if temporary.exists():
+                temporary.unlink()
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else count
+        self.stdout.write(
+            f'{path.name}: выгружено {count} строк ({rate:.0f} строк/с)')
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.management.commands.importcsv import sqlite_bulk_pragmas
+from reviews.synthetic import BATCH_SIZE, generate_dataset
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными продакшен-объёма: '
+            'отзывы распределены по произведениям по степенному закону, '
+            'комментарии — по отзывам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--titles', type=int, default=50000)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--reviews', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='Показатель степенного закона отзывов.')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Зерно генератора для повторяемых данных.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Строк в одном executemany.')
+
+    def handle(self, *args, **options):
+        sizes = ('users', 'titles', 'genres', 'categories', 'reviews',
+                 'comments')
+        if any(options[size] < 0 for size in sizes):
+            raise CommandError('Количества не могут быть отрицательными.')
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        if options['titles'] and not options['categories']:
+            raise CommandError('Для произведений нужна хотя бы одна '
+                               'категория.')
+        started = time.perf_counter()
+        with sqlite_bulk_pragmas():
+            created = generate_dataset(
+                *(options[size] for size in sizes),
+                alpha=options['alpha'], seed=options['seed'],
+                batch_size=options['batch_size'], report=self.report)
+        elapsed = time.perf_counter() - started
+        rows = sum(created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано строк: {rows} за {elapsed:.1f} с '
+            f'({rows / elapsed:.0f} строк/с).'))
+
+    def report(self, model, rows, seconds):
+        rate = rows / seconds if seconds else 0
+        self.stdout.write(f'{model}: {rows} строк за {seconds:.1f} с '
+                          f'({rate:.0f} строк/с)')
@@ -1,8 +1,25 @@
 import csv
+import gzip
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from graphlib import TopologicalSorter
+from itertools import islice
+from multiprocessing import Manager
+from pathlib import Path
 
+import django
+from django.apps import apps
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
 
+from api.cache import invalidate_all
+from reviews.bulk_validation import BatchValidator, InvalidValue
 from reviews.models import (Category, Comment, Genre, GenreTitle,
                             Review, Title, User)
 
@@ -16,24 +33,497 @@ TABLES = {
     GenreTitle: 'genre_title.csv',
 }
 
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_COMMIT_EVERY = 10
+STATE_FILE = '.importcsv_state.json'
+REPORT_FILE = 'importcsv_errors.jsonl'
+# Сколько готовых пачек каждого файла может ждать записи.
+QUEUE_SIZE = 4
+NDJSON_SUFFIX = '.ndjson'
+BATCH, DONE, ERROR = 'batch', 'done', 'error'
+
+# Настройки соединения SQLite на время загрузки: журнал не сбрасывается
+# на диск после каждой транзакции, временные данные держатся в памяти.
+SQLITE_BULK_PRAGMAS = {
+    'synchronous': 'OFF',
+    'cache_size': '-262144',
+    'temp_store': 'MEMORY',
+}
+
+
+@contextmanager
+def sqlite_bulk_pragmas():
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        previous = {}
+        for pragma, value in SQLITE_BULK_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}')
+            previous[pragma] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+        try:
+            yield
+        finally:
+            for pragma, value in previous.items():
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def read_rows(data_file, path):
+    """Строки файла словарями: csv с заголовком или JSON в строке (ndjson)."""
+    if NDJSON_SUFFIX in path.suffixes:
+        return (json.loads(line) for line in data_file if line.strip())
+    return csv.DictReader(data_file)
+
+
+def read_batches(rows, batch_size, skip=0):
+    rows = islice(rows, skip, None)
+    return iter(lambda: list(islice(rows, batch_size)), [])
+
+
+def get_import_order(tables):
+    """
+    Порядок загрузки по графу внешних ключей: каждая модель идёт после
+    моделей, на которые ссылается. Возвращает поколения независимых
+    друг от друга моделей.
+    """
+    graph = {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in tables
+            and field.related_model is not model
+        }
+        for model in tables
+    }
+    sorter = TopologicalSorter(graph)
+    sorter.prepare()
+    generations = []
+    while sorter.is_active():
+        ready = sorted(sorter.get_ready(), key=list(tables).index)
+        generations.append(ready)
+        sorter.done(*ready)
+    return generations
+
+
+def find_data_file(path):
+    """
+    Находит файл таблицы: `<имя>.csv`, выгрузку exportcsv в формате
+    ndjson `<имя>.ndjson` или сжатую копию любого из них `.gz`.
+    """
+    path = Path(path)
+    ndjson = path.with_suffix(NDJSON_SUFFIX)
+    for candidate in (path, path.with_name(f'{path.name}.gz'),
+                      ndjson, ndjson.with_name(f'{ndjson.name}.gz')):
+        if candidate.exists():
+            return candidate
+    return path
+
+
+def open_data_file(path):
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def to_python(field, value, keep_invalid=False):
+    if value == '' and field.null:
+        return None
+    try:
+        return field.to_python(value)
+    except ValidationError as error:
+        if not keep_invalid:
+            raise
+        return InvalidValue(value, ' '.join(error.messages))
+
+
+def parse_batches(model, path, batch_size, skip=0, keep_invalid=False):
+    """
+    Читает файл таблицы пачками и приводит значения к типам полей. С
+    `keep_invalid` значение, которое не приводится к типу, остаётся в
+    пачке как InvalidValue: его отбракует проверка строк.
+    """
+    path = find_data_file(path)
+    with open_data_file(path) as data_file:
+        fields = None
+        for batch in read_batches(
+                read_rows(data_file, path), batch_size, skip):
+            if fields is None:
+                fields = {
+                    column: model._meta.get_field(column)
+                    for column in batch[0]
+                }
+            yield [
+                {
+                    fields[column].attname: to_python(
+                        fields[column], value, keep_invalid)
+                    for column, value in row.items()
+                }
+                for row in batch
+            ]
+
+
+@contextmanager
+def csv_timestamps(model, columns):
+    """
+    Отключает auto_now/auto_now_add для колонок из файла: иначе
+    bulk_create заменил бы даты публикации текущим временем.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in columns
+        and (getattr(field, 'auto_now', False)
+             or getattr(field, 'auto_now_add', False))
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def setup_worker():
+    django.setup()
+
+
+def parse_in_worker(model_label, path, batch_size, skip, keep_invalid,
+                    queue):
+    """
+    Выполняется в пуле процессов. Ошибки передаются через очередь,
+    иначе процесс записи ждал бы следующую пачку бесконечно.
+    """
+    try:
+        model = apps.get_model(model_label)
+        for batch in parse_batches(
+                model, path, batch_size, skip, keep_invalid):
+            queue.put((BATCH, batch))
+        queue.put((DONE, None))
+    except Exception as error:
+        queue.put((ERROR, f'{type(error).__name__}: {error}'))
+
+
+def read_queue(queue):
+    while True:
+        kind, payload = queue.get()
+        if kind == ERROR:
+            raise ValueError(payload)
+        if kind == DONE:
+            return
+        yield payload
+
 
 class Command(BaseCommand):
+    help = 'Загружает данные из файлов csv или ndjson в базу данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=Path(settings.BASE_DIR) / 'static' / 'data',
+            type=Path,
+            help='Каталог с файлами csv или ndjson, в том числе сжатыми gzip.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            default=DEFAULT_BATCH_SIZE,
+            type=int,
+            help='Количество строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--commit-every',
+            default=DEFAULT_COMMIT_EVERY,
+            type=int,
+            help='Количество пачек в одной транзакции.'
+        )
+        parser.add_argument(
+            '--jobs',
+            default=os.cpu_count(),
+            type=int,
+            help='Количество процессов для разбора csv-файлов.'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить загрузку с последней сохранённой транзакции.'
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Добавить новые строки и обновить изменённые по первичному '
+                 'ключу вместо загрузки в пустые таблицы.'
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            help='В режиме --sync удалить строки, которых нет в файлах.'
+        )
+        parser.add_argument(
+            '--validate-only',
+            action='store_true',
+            help='Только проверить файлы и записать отчёт об ошибках.'
+        )
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            help='Пропускать строки с ошибками вместо остановки загрузки.'
+        )
+        parser.add_argument(
+            '--no-validation',
+            action='store_true',
+            help='Не проверять строки перед записью.'
+        )
+        parser.add_argument(
+            '--report',
+            type=Path,
+            help='Файл отчёта об ошибках в формате JSON Lines '
+                 f'(по умолчанию {REPORT_FILE} в каталоге с данными).'
+        )
+
+    def handle(self, *args, **options):
+        self.check_options(options)
+        self.sync = options['sync']
+        self.validate_only = options['validate_only']
+        self.skip_invalid = options['skip_invalid']
+        self.validator = (
+            None if options['no_validation'] else BatchValidator())
+        self.batch_size = options['batch_size']
+        self.data_dir = options['data_dir']
+        self.state_path = self.data_dir / STATE_FILE
+        self.report_path = options['report'] or self.data_dir / REPORT_FILE
+        self.report_path.unlink(missing_ok=True)
+        self.error_count = 0
+        state = self.load_state() if options['resume'] else {}
+        order = [
+            model for generation in get_import_order(TABLES)
+            for model in generation
+        ]
+
+        with ExitStack() as stack:
+            if options['jobs'] > 1:
+                batches = self.start_workers(
+                    stack, order, options['jobs'], state)
+            else:
+                batches = {
+                    model: parse_batches(
+                        model, self.data_dir / TABLES[model], self.batch_size,
+                        state.get(TABLES[model], 0),
+                        self.validator is not None)
+                    for model in order
+                }
+            stack.enter_context(sqlite_bulk_pragmas())
+            seen = {}
+            for model in order:
+                csv_f = TABLES[model]
+                seen[model] = set()
+                state[csv_f] = self.import_table(
+                    model, csv_f, batches[model], state.get(csv_f, 0),
+                    options['commit_every'], state, seen[model]
+                )
+            if self.validate_only:
+                return self.finish_validation()
+            if options['delete_missing']:
+                for model in reversed(order):
+                    self.delete_missing(model, seen[model])
+        Title.objects.refresh_rating()
+        Review.objects.refresh_comment_count()
+        invalidate_all()
+        self.state_path.unlink(missing_ok=True)
+        if self.error_count:
+            self.stdout.write(self.style.WARNING(
+                f'Строки с ошибками пропущены (ошибок: {self.error_count}), '
+                f'отчёт: {self.report_path}'))
+        self.stdout.write(self.style.SUCCESS('Все данные загружены'))
+
+    def check_options(self, options):
+        if options['batch_size'] < 1 or options['commit_every'] < 1:
+            raise CommandError(
+                'Размер пачки и количество пачек должны быть больше нуля.')
+        if options['delete_missing'] and not options['sync']:
+            raise CommandError('--delete-missing работает только с --sync.')
+        if options['delete_missing'] and options['resume']:
+            raise CommandError(
+                '--delete-missing нельзя совмещать с --resume: пропущенные '
+                'строки будут считаться отсутствующими. Синхронизация '
+                'идемпотентна, запустите её заново без --resume.')
+        if options['validate_only'] and options['no_validation']:
+            raise CommandError(
+                '--validate-only нельзя совмещать с --no-validation.')
 
-    def handle(self, *args, **kwargs):
+    def finish_validation(self):
+        if self.error_count:
+            raise CommandError(
+                f'Найдено ошибок: {self.error_count}, '
+                f'отчёт: {self.report_path}')
+        self.stdout.write(self.style.SUCCESS('Ошибок в данных не найдено'))
+
+    def start_workers(self, stack, order, jobs, state):
+        """
+        Запускает разбор всех файлов в пуле процессов. Задачи ставятся в
+        порядке загрузки, поэтому файл, который сейчас пишется, всегда уже
+        разбирается, а очереди ограничивают память остальных. Соединение
+        с базой закрывается заранее, чтобы не наследоваться процессами.
+        """
+        connection.close()
+        pool = stack.enter_context(ProcessPoolExecutor(
+            max_workers=jobs, initializer=setup_worker))
+        # Менеджер закрывается раньше пула: заблокированные на записи в
+        # очередь процессы получат ошибку и завершатся.
+        manager = stack.enter_context(Manager())
+        batches = {}
+        for model in order:
+            csv_f = TABLES[model]
+            queue = manager.Queue(maxsize=QUEUE_SIZE)
+            pool.submit(parse_in_worker, model._meta.label,
+                        self.data_dir / csv_f, self.batch_size,
+                        state.get(csv_f, 0), self.validator is not None,
+                        queue)
+            batches[model] = read_queue(queue)
+        return batches
+
+    def import_table(self, model, csv_f, batches, done, commit_every, state,
+                     seen):
+        started = time.monotonic()
+        loaded = 0
+        self.stats = Counter()
+        # После сбоя файл состояния может отстать от базы на одну
+        # транзакцию, поэтому первая из них допускает повторные строки.
+        ignore_conflicts = done > 0
+        try:
+            while True:
+                chunk = list(islice(batches, commit_every))
+                if not chunk:
+                    break
+                with transaction.atomic(), csv_timestamps(model, chunk[0][0]):
+                    position = done
+                    for batch in chunk:
+                        if self.sync:
+                            seen.update(
+                                data[model._meta.pk.attname] for data in batch)
+                        valid = self.validate_batch(
+                            model, csv_f, batch, position)
+                        position += len(batch)
+                        if valid and not self.validate_only:
+                            self.write_batch(model, valid, ignore_conflicts)
+                ignore_conflicts = False
+                count = sum(len(batch) for batch in chunk)
+                done += count
+                loaded += count
+                if self.validate_only:
+                    continue
+                state[csv_f] = done
+                self.save_state(state)
+                self.report(csv_f, done, loaded, started)
+        except FileNotFoundError as error:
+            raise CommandError(
+                f'Файл не найден, проверьте директорию: {error}') from error
+        except (csv.Error, DatabaseError, TypeError, ValueError,
+                ValidationError) as error:
+            raise CommandError(
+                f'Ошибка загрузки {csv_f} после строки {done}: {error}\n'
+                'Исправьте данные и запустите команду с --resume.'
+            ) from error
+        return done
+
+    def write_batch(self, model, batch, ignore_conflicts):
+        if self.sync:
+            self.sync_batch(model, batch)
+            return
+        model.objects.bulk_create(
+            (model(**data) for data in batch),
+            batch_size=self.batch_size,
+            ignore_conflicts=ignore_conflicts
+        )
+
+    def validate_batch(self, model, csv_f, batch, position):
+        """
+        Возвращает строки пачки, прошедшие проверку. Ошибки дописываются
+        в отчёт с номером записи в файле, считая с единицы.
+        """
+        if self.validator is None:
+            return batch
+        errors = self.validator.validate(model, batch)
+        if not errors:
+            return batch
+        invalid = {row_error['row'] for row_error in errors}
+        with open(self.report_path, 'a', encoding='utf-8') as report:
+            for row_error in errors:
+                row_error['file'] = csv_f
+                row_error['row'] += position + 1
+                report.write(json.dumps(
+                    row_error, ensure_ascii=False, default=str) + '\n')
+        self.error_count += len(errors)
+        if not (self.skip_invalid or self.validate_only):
+            raise CommandError(
+                f'{csv_f}: найдены ошибки в данных, отчёт: '
+                f'{self.report_path}\nИсправьте данные и запустите команду '
+                'с --resume или используйте --skip-invalid.')
+        return [data for index, data in enumerate(batch)
+                if index not in invalid]
+
+    def sync_batch(self, model, batch):
+        """
+        Сравнивает пачку с текущими строками по первичному ключу: новые
+        добавляются одним bulk_create, изменённые обновляются bulk_update
+        только по отличающимся колонкам.
+        """
+        pk = model._meta.pk.attname
+        columns = list(batch[0])
+        existing = {
+            row[pk]: row for row in model.objects.filter(
+                pk__in=[data[pk] for data in batch]).values(*columns)
+        }
+        created = []
+        changed = defaultdict(list)
+        for data in batch:
+            current = existing.get(data[pk])
+            if current is None:
+                created.append(model(**data))
+                continue
+            fields = tuple(
+                column for column in columns if current[column] != data[column]
+            )
+            if fields:
+                changed[fields].append(model(**data))
+        model.objects.bulk_create(created, batch_size=self.batch_size)
+        for fields, objs in changed.items():
+            model.objects.bulk_update(objs, fields,
+                                      batch_size=self.batch_size)
+        self.stats['created'] += len(created)
+        self.stats['updated'] += sum(len(objs) for objs in changed.values())
+
+    def delete_missing(self, model, seen):
+        missing = [
+            pk for pk in model.objects.values_list('pk', flat=True).iterator()
+            if pk not in seen
+        ]
+        for start in range(0, len(missing), self.batch_size):
+            with transaction.atomic():
+                model.objects.filter(
+                    pk__in=missing[start:start + self.batch_size]).delete()
+        self.stdout.write(
+            f'{TABLES[model]}: удалено {len(missing)} строк')
+
+    def report(self, csv_f, done, loaded, started):
+        elapsed = time.monotonic() - started
+        rate = loaded / elapsed if elapsed else loaded
+        details = ''
+        if self.sync:
+            details = (f', добавлено {self.stats["created"]}, '
+                       f'обновлено {self.stats["updated"]}')
+        self.stdout.write(
+            f'{csv_f}: загружено {done} строк ({rate:.0f} строк/с{details})')
+
+    def load_state(self):
         try:
-            for model, csv_f in TABLES.items():
-                with open(
-                    f'{settings.BASE_DIR}/static/data/{csv_f}',
-                    'r',
-                    encoding='utf-8'
-                ) as csv_file:
-                    reader = csv.DictReader(csv_file)
-                    model.objects.bulk_create(
-                        model(**data) for data in reader)
-            self.stdout.write(self.style.SUCCESS('Все данные загружены'))
-        except FileNotFoundError as er:
-            print(f"Возникла ошибка. Проверьте директорию. Файл не найден\n"
-                  f"{er}")
-        except Exception as error:
-            print("Ошибка")
-            print(error)
+            return json.loads(self.state_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError as error:
+            raise CommandError(
+                f'Повреждён файл состояния {self.state_path}: {error}'
+            ) from error
+
+    def save_state(self, state):
+        self.state_path.write_text(json.dumps(state))
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.mail import deliver_batch, purge_expired
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди пачками через одно соединение '
+            'с почтовым сервером, неудачные повторяет с нарастающей '
+            'задержкой. Отправленные письма удаляются через '
+            'EMAIL_QUEUE_RETENTION.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Отправить накопившиеся письма и выйти.')
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+                            help='Писем на одно соединение.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза между опросами пустой очереди, с.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено: {sent}, с ошибкой: {failed}.')
+            if sent + failed == options['batch_size']:
+                continue
+            purged = purge_expired()
+            if purged:
+                self.stdout.write(f'Удалено старых писем: {purged}.')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.replicas import sync_replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из DB_REPLICAS '
+            'через backup API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Скопировать базу один раз и выйти.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза между копиями, с.')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте DB_REPLICAS.')
+        while True:
+            sync_replicas()
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-18 08:43
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import reviews.validators
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+    Title.objects.update(
+        rating_sum=Coalesce(Subquery(
+            reviews.annotate(total=Sum('score')).values('total')), 0),
+        rating_count=Coalesce(Subquery(
+            reviews.annotate(total=Count('pk')).values('total')), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20230523_0936'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='score',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1, message='Введите целое число не менее 1.'), django.core.validators.MaxValueValidator(10, message='Введите целое число не более 10.')], verbose_name='оценка'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.PositiveSmallIntegerField(db_index=True, validators=[reviews.validators.validate_year_field], verbose_name='год выпуска'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
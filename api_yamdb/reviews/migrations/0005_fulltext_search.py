@@ -0,0 +1,44 @@
+from django.db import migrations
+
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+
+def fts_sql(fts_table, table, columns):
+    """
+    Внешняя (external content) таблица FTS5 хранит только индекс, а
+    триггеры поддерживают его при любой записи, включая bulk_create.
+    """
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = (f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) "
+              f"VALUES ('delete', old.id, {old});")
+    insert = (f'INSERT INTO {fts_table}(rowid, {names}) '
+              f'VALUES (new.id, {new});')
+    forward = [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({names}, "
+        f"content = '{table}', content_rowid = 'id', {TOKENIZE});",
+        f'CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} '
+        f'BEGIN {insert} END;',
+        f'CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} '
+        f'BEGIN {delete} END;',
+        f'CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {names} ON {table} '
+        f'BEGIN {delete} {insert} END;',
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild');",
+    ]
+    backward = [f'DROP TABLE {fts_table};'] + [
+        f'DROP TRIGGER {fts_table}_{suffix};' for suffix in ('ai', 'ad', 'au')
+    ]
+    return migrations.RunSQL(forward, backward)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        fts_sql('reviews_title_fts', 'reviews_title', ('name', 'description')),
+        fts_sql('reviews_review_fts', 'reviews_review', ('text',)),
+    ]
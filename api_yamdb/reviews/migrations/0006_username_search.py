@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 09:03
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+FTS_TABLE = 'reviews_user_fts'
+DELETE = (f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, username) "
+          f"VALUES ('delete', old.id, old.username);")
+INSERT = (f'INSERT INTO {FTS_TABLE}(rowid, username) '
+          f'VALUES (new.id, new.username);')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='user_username_lower_idx'),
+        ),
+        migrations.RunSQL(
+            [
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(username, "
+                f"content = 'reviews_user', content_rowid = 'id', "
+                f"tokenize = 'trigram');",
+                f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON reviews_user '
+                f'BEGIN {INSERT} END;',
+                f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON reviews_user '
+                f'BEGIN {DELETE} END;',
+                f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF username '
+                f'ON reviews_user BEGIN {DELETE} {INSERT} END;',
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild');",
+            ],
+            [f'DROP TABLE {FTS_TABLE};'] + [
+                f'DROP TRIGGER {FTS_TABLE}_{suffix};'
+                for suffix in ('ai', 'ad', 'au')
+            ]
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 09:19
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_username_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingMail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='тема')),
+                ('body', models.TextField(verbose_name='текст')),
+                ('from_email', models.CharField(max_length=254, verbose_name='отправитель')),
+                ('recipients', models.TextField(verbose_name='получатели')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='создано')),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='отправить после')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='отправлено')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попытки')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'исходящее письмо',
+                'verbose_name_plural': 'исходящие письма',
+                'ordering': ('send_after',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outgoingmail',
+            index=models.Index(fields=['sent_at', 'send_after'], name='outgoing_mail_due_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2 on 2026-10-18 09:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def move_codes(apps, schema_editor):
+    User = apps.get_model('reviews', 'User')
+    ConfirmationCode = apps.get_model('reviews', 'ConfirmationCode')
+    expires_at = timezone.now() + settings.CONFIRMATION_CODE_LIFETIME
+    ConfirmationCode.objects.bulk_create(
+        ConfirmationCode(user_id=pk, code=code, expires_at=expires_at)
+        for pk, code in User.objects.exclude(
+            confirmation_code__in=('', '0')
+        ).values_list('pk', 'confirmation_code').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_outgoing_mail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfirmationCode',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='confirmation', serialize=False, to='reviews.user', verbose_name='пользователь')),
+                ('code', models.CharField(max_length=4, verbose_name='код')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='действует до')),
+            ],
+            options={
+                'verbose_name': 'код подтверждения',
+                'verbose_name_plural': 'коды подтверждения',
+            },
+        ),
+        migrations.RunPython(move_codes, migrations.RunPython.noop),
+        # Пересоздание таблицы в SQLite потеряло бы триггеры поиска и
+        # не справляется с индексом по LOWER(username).
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(
+                'ALTER TABLE reviews_user DROP COLUMN confirmation_code;',
+                'ALTER TABLE reviews_user ADD COLUMN confirmation_code '
+                "varchar(4) NOT NULL DEFAULT '';",
+            )],
+            state_operations=[migrations.RemoveField(
+                model_name='user',
+                name='confirmation_code',
+            )],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 10:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_count(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    comments = Comment.objects.filter(
+        review=OuterRef('pk')).order_by().values('review')
+    Review.objects.update(comment_count=Coalesce(Subquery(
+        comments.annotate(total=Count('pk')).values('total')), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_confirmation_code'),
+    ]
+
+    operations = [
+        # Пересоздание таблицы в SQLite потеряло бы триггеры поиска.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(
+                'ALTER TABLE reviews_review ADD COLUMN comment_count '
+                'integer unsigned NOT NULL DEFAULT 0 '
+                'CHECK (comment_count >= 0);',
+                'ALTER TABLE reviews_review DROP COLUMN comment_count;',
+            )],
+            state_operations=[migrations.AddField(
+                model_name='review',
+                name='comment_count',
+                field=models.PositiveIntegerField(default=0, editable=False, verbose_name='количество комментариев'),
+            )],
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 10:08
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_review_comment_count'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_username_lower_idx',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 10:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_drop_username_lower_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='набор данных')),
+                ('value', models.PositiveBigIntegerField(default=0, verbose_name='версия')),
+            ],
+            options={
+                'verbose_name': 'версия данных',
+                'verbose_name_plural': 'версии данных',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-18 10:16
+
+from django.db import migrations, models
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_data_version'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', reviews.models.UserManager()),
+            ],
+        ),
+        # Пересоздание таблицы в SQLite потеряло бы триггеры поиска.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(
+                'ALTER TABLE reviews_user ADD COLUMN claims_version '
+                'integer unsigned NOT NULL DEFAULT 0 '
+                'CHECK (claims_version >= 0);',
+                'ALTER TABLE reviews_user DROP COLUMN claims_version;',
+            )],
+            state_operations=[migrations.AddField(
+                model_name='user',
+                name='claims_version',
+                field=models.PositiveIntegerField(default=0, editable=False, verbose_name='версия утверждений токена'),
+            )],
+        ),
+    ]
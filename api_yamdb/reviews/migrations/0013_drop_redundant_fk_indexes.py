@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 10:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_user_claims_version'),
+    ]
+
+    operations = [
+        # Пересоздание таблиц в SQLite потеряло бы триггеры поиска.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX "reviews_comment_review_id_43f1c708";',
+                    'CREATE INDEX "reviews_comment_review_id_43f1c708" '
+                    'ON "reviews_comment" ("review_id");',
+                ),
+                migrations.RunSQL(
+                    'DROP INDEX "reviews_review_title_id_a695a85f";',
+                    'CREATE INDEX "reviews_review_title_id_a695a85f" '
+                    'ON "reviews_review" ("title_id");',
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='comment',
+                    name='review',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='reviews.review', verbose_name='отзыв'),
+                ),
+                migrations.AlterField(
+                    model_name='review',
+                    name='title',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='reviews.title', verbose_name='произведение'),
+                ),
+            ],
+        ),
+    ]
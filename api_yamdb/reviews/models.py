@@ -1,7 +1,15 @@
-from django.contrib.auth.models import AbstractUser
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import (AbstractUser,
+                                        UserManager as BaseUserManager)
 from django.core.validators import (MaxValueValidator,
                                     MinValueValidator)
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum)
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
 
 from api.utils import (CODE_LENGTH, EMAIL_LENGTH, NAME_LENGTH,
                        USERNAME_LENGTH, SLUG_LENGTH)
@@ -50,6 +58,27 @@ class Genre(AbstractNameSlug):
         ]
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def with_rating(self):
+        """Рейтинг из хранимых суммы и количества оценок, без JOIN."""
+        return self.annotate(rating=ExpressionWrapper(
+            F('rating_sum') * 1.0 / NullIf(F('rating_count'), 0),
+            output_field=FloatField()
+        ))
+
+    def refresh_rating(self):
+        """Пересчитывает хранимые оценки по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(Subquery(
+                reviews.annotate(total=Sum('score')).values('total')), 0),
+            rating_count=Coalesce(Subquery(
+                reviews.annotate(total=Count('pk')).values('total')), 0)
+        )
+
+
 class Title(models.Model):
     name = models.CharField(verbose_name='название', max_length=NAME_LENGTH)
     year = models.PositiveSmallIntegerField(verbose_name='год выпуска',
@@ -65,6 +94,16 @@ class Title(models.Model):
                                    validators=[validate_genre_field],
                                    through='GenreTitle',
                                    verbose_name='жанр')
+    rating_sum = models.PositiveIntegerField(verbose_name='сумма оценок',
+                                             default=0,
+                                             editable=False)
+    rating_count = models.PositiveIntegerField(
+        verbose_name='количество оценок',
+        default=0,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('-name',)
@@ -90,10 +129,30 @@ class GenreTitle(models.Model):
         return f'{self.genre} {self.title}'
 
 
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """
+        Массовое изменение полей из токена сдвигает версию утверждений,
+        как и save(): выданные токены перестают приниматься на веру.
+        """
+        if (set(kwargs) & set(User.TOKEN_FIELDS)
+                and 'claims_version' not in kwargs):
+            kwargs['claims_version'] = F('claims_version') + 1
+        return super().update(**kwargs)
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     USER = 'user'
     ADMIN = 'admin'
     MODERATOR = 'moderator'
+    # Поля, которые записываются в токен доступа или решают, примут ли его.
+    TOKEN_FIELDS = ('username', 'role', 'is_staff', 'is_superuser',
+                    'is_active')
 
     ROLE_CHOICES = (
         (USER, 'Пользователь'),
@@ -122,8 +181,13 @@ class User(AbstractUser):
                                  max_length=USERNAME_LENGTH,
                                  blank=True)
     bio = models.TextField(verbose_name='биография', blank=True)
-    confirmation_code = models.CharField(verbose_name='код подтверждения',
-                                         max_length=CODE_LENGTH)
+    claims_version = models.PositiveIntegerField(
+        verbose_name='версия утверждений токена',
+        default=0,
+        editable=False
+    )
+
+    objects = UserManager()
 
     @property
     def is_admin(self):
@@ -142,6 +206,54 @@ class User(AbstractUser):
         return self.username
 
 
+class ConfirmationCodeQuerySet(models.QuerySet):
+
+    def issue(self, user, code):
+        """Новый код заменяет прежний: у пользователя одна строка."""
+        values = {
+            'code': code,
+            'expires_at': timezone.now() + settings.CONFIRMATION_CODE_LIFETIME,
+        }
+        if self.filter(user=user).update(**values):
+            return
+        try:
+            with transaction.atomic():
+                self.create(user=user, **values)
+        except IntegrityError:
+            self.filter(user=user).update(**values)
+
+    def consume(self, user, code):
+        """Проверяет и гасит код одним DELETE по первичному ключу."""
+        deleted, _ = self.filter(
+            user=user, code=code, expires_at__gt=timezone.now()).delete()
+        return bool(deleted)
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class ConfirmationCode(models.Model):
+    """Код подтверждения хранится отдельно, чтобы не переписывать User."""
+
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='confirmation',
+                                verbose_name='пользователь')
+    code = models.CharField(verbose_name='код', max_length=CODE_LENGTH)
+    expires_at = models.DateTimeField(verbose_name='действует до',
+                                      db_index=True)
+
+    objects = ConfirmationCodeQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'код подтверждения'
+        verbose_name_plural = 'коды подтверждения'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.expires_at}'
+
+
 class AbstractTextAuthorPubdate(models.Model):
     """Абстрактная модель для Отзывов и Комментариев."""
 
@@ -159,10 +271,31 @@ class AbstractTextAuthorPubdate(models.Model):
     def __str__(self):
         return self.text[:10]
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет объект в одной транзакции с пересчётом хранимых
+        счётчиков родителя (reviews.signals).
+        """
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class ReviewQuerySet(models.QuerySet):
+
+    def refresh_comment_count(self):
+        """Пересчитывает хранимое количество комментариев."""
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')).order_by().values('review')
+        return self.update(comment_count=Coalesce(Subquery(
+            comments.annotate(total=Count('pk')).values('total')), 0))
+
 
 class Review(AbstractTextAuthorPubdate):
+    # Отдельный индекс не нужен: title_id — первый столбец
+    # review_title_pub_date_idx.
     title = models.ForeignKey(Title,
                               on_delete=models.CASCADE,
+                              db_index=False,
                               verbose_name='произведение')
     score = models.PositiveSmallIntegerField(
         verbose_name='оценка',
@@ -173,6 +306,13 @@ class Review(AbstractTextAuthorPubdate):
                               message="Введите целое число не более 10.")
         ]
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='количество комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta(AbstractTextAuthorPubdate.Meta):
         verbose_name = 'отзыв'
@@ -184,14 +324,123 @@ class Review(AbstractTextAuthorPubdate):
                 name='unique_review'
             )
         ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx')
+        ]
 
 
 class Comment(AbstractTextAuthorPubdate):
+    # Отдельный индекс не нужен: review_id — первый столбец
+    # comment_review_pub_date_idx.
     review = models.ForeignKey(Review,
                                on_delete=models.CASCADE,
+                               db_index=False,
                                verbose_name='отзыв')
 
     class Meta(AbstractTextAuthorPubdate.Meta):
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
         default_related_name = 'comments'
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx')
+        ]
+
+
+class OutgoingMailQuerySet(models.QuerySet):
+
+    def expired(self):
+        """
+        Отправленные письма и письма, исчерпавшие попытки, старше
+        EMAIL_QUEUE_RETENTION.
+        """
+        cutoff = timezone.now() - settings.EMAIL_QUEUE_RETENTION
+        return self.filter(
+            models.Q(sent_at__lte=cutoff)
+            | models.Q(sent_at__isnull=True, created_at__lte=cutoff,
+                       attempts__gte=settings.EMAIL_QUEUE_MAX_ATTEMPTS)
+        )
+
+
+class OutgoingMail(models.Model):
+    """Письмо в очереди на отправку командой sendqueuedmail."""
+
+    subject = models.CharField(verbose_name='тема', max_length=255)
+    body = models.TextField(verbose_name='текст')
+    from_email = models.CharField(verbose_name='отправитель',
+                                  max_length=EMAIL_LENGTH)
+    recipients = models.TextField(verbose_name='получатели')
+    created_at = models.DateTimeField(verbose_name='создано',
+                                      auto_now_add=True)
+    send_after = models.DateTimeField(verbose_name='отправить после',
+                                      default=timezone.now)
+    sent_at = models.DateTimeField(verbose_name='отправлено',
+                                   null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(verbose_name='попытки',
+                                                default=0)
+    last_error = models.TextField(verbose_name='последняя ошибка',
+                                  blank=True)
+
+    objects = OutgoingMailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('send_after',)
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'исходящие письма'
+        indexes = [
+            models.Index(fields=['sent_at', 'send_after'],
+                         name='outgoing_mail_due_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
+
+
+class DataVersionQuerySet(models.QuerySet):
+
+    def bump(self, *names):
+        """
+        Записывает новые версии в текущей транзакции: они становятся
+        видны другим процессам вместе с самим изменением. Версия — время
+        в наносекундах, поэтому не повторяет прежние и после очистки
+        таблицы.
+        """
+        value = time.time_ns()
+        existing = set(self.filter(name__in=names).values_list(
+            'name', flat=True))
+        if existing:
+            self.filter(name__in=existing).update(value=value)
+        # Строку, созданную параллельно, не перезаписываем: её версия
+        # тоже новая.
+        self.bulk_create(
+            [self.model(name=name, value=value)
+             for name in dict.fromkeys(names) if name not in existing],
+            ignore_conflicts=True)
+
+    def current(self, name):
+        return self.current_many(name)[name]
+
+    def current_many(self, *names):
+        """Версии наборов одним запросом; у неизменённых версия 0."""
+        versions = dict(self.filter(name__in=names).values_list(
+            'name', 'value'))
+        return {name: versions.get(name, 0) for name in names}
+
+
+class DataVersion(models.Model):
+    """Версия набора данных, общая для всех процессов."""
+
+    name = models.CharField(verbose_name='набор данных',
+                            max_length=SLUG_LENGTH,
+                            primary_key=True)
+    value = models.PositiveBigIntegerField(verbose_name='версия', default=0)
+
+    objects = DataVersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'версия данных'
+        verbose_name_plural = 'версии данных'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
@@ -0,0 +1,106 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Comment, Review, Title, User
+
+# Хранимые счётчики не сдвигаются на разницу, а пересчитываются по
+# таблице в транзакции записи: разница, посчитанная двумя запросами
+# одновременно, дала бы расхождение, а post_delete приходит и тогда,
+# когда строку уже удалил другой запрос.
+
+
+def refresh_rating(*title_ids):
+    Title.objects.filter(pk__in=title_ids).refresh_rating()
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, raw, **kwargs):
+    """Запоминает оценку и произведение до изменения отзыва."""
+    instance._previous_rating = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_rating = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list('title_id', 'score')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if created or previous is None:
+        refresh_rating(instance.title_id)
+    elif previous != (instance.title_id, instance.score):
+        refresh_rating(previous[0], instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    refresh_rating(instance.title_id)
+
+
+def refresh_comment_count(*review_ids):
+    Review.objects.filter(pk__in=review_ids).refresh_comment_count()
+
+
+@receiver(pre_save, sender=Comment)
+def remember_previous_review(sender, instance, raw, **kwargs):
+    """Запоминает отзыв, к которому комментарий относился до изменения."""
+    instance._previous_review_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_review_id = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list('review_id', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_review_id', None)
+    if created or previous is None:
+        refresh_comment_count(instance.review_id)
+    elif previous != instance.review_id:
+        refresh_comment_count(previous, instance.review_id)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_count_on_delete(sender, instance, **kwargs):
+    refresh_comment_count(instance.review_id)
+
+
+@receiver(pre_save, sender=User)
+def bump_claims_version(sender, instance, raw, update_fields, **kwargs):
+    """
+    Смена имени, роли, флагов или активности сдвигает версию утверждений:
+    токены со старой версией перестают приниматься на веру. Изменённые
+    поля запоминаются в `_changed_token_fields`.
+    """
+    instance._changed_token_fields = set()
+    if raw or instance.pk is None:
+        return
+    fields = User.TOKEN_FIELDS
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+        if not fields:
+            return
+    previous = User.objects.filter(pk=instance.pk).values(
+        'claims_version', *fields).first()
+    if previous is None:
+        return
+    instance._changed_token_fields = {
+        field for field in fields
+        if previous[field] != getattr(instance, field)
+    }
+    if not instance._changed_token_fields:
+        return
+    instance.claims_version = previous['claims_version'] + 1
+    if update_fields is not None:
+        User.objects.filter(pk=instance.pk).update(
+            claims_version=instance.claims_version)
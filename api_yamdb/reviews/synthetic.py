@@ -0,0 +1,334 @@
+"""
+Синтетический набор данных для нагрузочных тестов: пользователи,
+жанры, категории, произведения, отзывы и комментарии. Число отзывов на
+произведение распределено по степенному закону (закон Ципфа): немногие
+популярные произведения собирают большую часть отзывов, как в
+продакшене. Каждый автор оставляет не больше одного отзыва на
+произведение, так что ограничение unique_review соблюдается.
+
+Значения готовятся целыми столбцами без цикла на Python для каждой
+строки: случайные индексы — из random.randbytes, разобранных как массив
+целых, столбцы — через map с функциями operator. Строки собираются из
+столбцов через zip и пишутся одним executemany на пачку, минуя модели,
+валидаторы и сигналы. Рейтинги и счётчики комментариев считаются до
+записи и пишутся вместе со строками. Индексы и триггеры таблиц на время
+загрузки снимаются и создаются заново в конце; проверка внешних ключей
+отключена, потому что ключи верны по построению.
+"""
+import datetime as dt
+import random
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice, repeat
+from math import gcd
+from operator import add, floordiv, mod, mul
+
+from django.db import connection, transaction
+from django.db.models import AutoField, Max
+from django.utils import timezone
+
+from api.cache import invalidate_all
+from .models import (Category, Comment, Genre, GenreTitle, Review, Title,
+                     User)
+
+MIN_YEAR = 1900
+MAX_GENRES_PER_TITLE = 3
+MAX_SCORE = 10
+SCORE_SPAN = MAX_SCORE + 1
+BATCH_SIZE = 50000
+# Пулы готовых значений: выбирать из них быстрее, чем собирать каждое.
+TEXT_POOL_SIZE = 1000
+DATE_POOL_SIZE = 10000
+DATE_RANGE = dt.timedelta(days=5 * 365)
+WORDS = ('звезда', 'ночь', 'город', 'море', 'песня', 'дорога', 'время',
+         'война', 'любовь', 'тайна', 'огонь', 'ветер', 'тень', 'сад')
+BULK_MODELS = (User, Title, GenreTitle, Review, Comment)
+# Полнотекстовые индексы и столбцы, которые в них пишут триггеры.
+FTS_TABLES = {
+    'reviews_user_fts': (User, ('username',)),
+    'reviews_title_fts': (Title, ('name', 'description')),
+    'reviews_review_fts': (Review, ('text',)),
+}
+# Случайные индексы собираются из 32-битных целых.
+RANDOM_ITEM = 'I'
+
+
+def popularity_weights(count, alpha):
+    return [1 / rank ** alpha for rank in range(1, count + 1)]
+
+
+def split_power_law(total, count, alpha, cap):
+    """
+    Делит `total` отзывов между `count` произведениями пропорционально
+    весам Ципфа, не больше `cap` на произведение: излишек переходит к
+    следующим по популярности, остаток от округления — по одному самым
+    популярным.
+    """
+    weights = popularity_weights(count, alpha)
+    counts = [0] * count
+    remaining = min(total, count * cap)
+    open_ranks = list(range(count))
+    while remaining and open_ranks:
+        scale = remaining / sum(weights[rank] for rank in open_ranks)
+        capped = False
+        for rank in open_ranks:
+            share = int(weights[rank] * scale)
+            if share >= cap - counts[rank]:
+                share = cap - counts[rank]
+                capped = True
+            counts[rank] += share
+            remaining -= share
+        open_ranks = [rank for rank in open_ranks if counts[rank] < cap]
+        if not capped:
+            for rank in open_ranks[:remaining]:
+                counts[rank] += 1
+            remaining -= min(remaining, len(open_ranks))
+    return counts
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def choices(rng, population, k):
+    """
+    Как rng.choices(population, k=k), но без цикла на Python: k целых
+    из randbytes приводятся к индексам по модулю длины пула.
+    """
+    if not k:
+        return []
+    indexes = array(RANDOM_ITEM, rng.randbytes(
+        k * array(RANDOM_ITEM).itemsize))
+    return list(map(population.__getitem__,
+                    map(mod, indexes, repeat(len(population)))))
+
+
+def spread(rng, size, count):
+    """
+    `count` разных индексов из range(size): арифметическая прогрессия с
+    шагом, взаимно простым с size, от случайного начала по модулю size.
+    """
+    step = rng.randrange(1, size) if size > 1 else 1
+    while gcd(step, size) != 1:
+        step += 1
+    start = rng.randrange(size)
+    return map(mod, range(start, start + count * step, step),
+               repeat(size))
+
+
+def sentence(rng, words=6):
+    return ' '.join(rng.choices(WORDS, k=words)).capitalize() + '.'
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class RowWriter:
+    """
+    Пишет строки модели через executemany. Значения передаются
+    столбцами в порядке `columns`, остальные поля получают значения по
+    умолчанию, подготовленные для базы один раз.
+    """
+
+    def __init__(self, cursor, model, columns, batch_size, report=None):
+        self.cursor = cursor
+        self.model = model
+        self.batch_size = batch_size
+        self.report = report
+        self.count = 0
+        fields = [model._meta.get_field(name) for name in columns]
+        rest = [
+            field for field in model._meta.concrete_fields
+            if field not in fields
+            and not (field.primary_key and isinstance(field, AutoField))
+        ]
+        self.defaults = tuple(
+            field.get_db_prep_save(field.get_default(), connection)
+            for field in rest
+        )
+        names = ', '.join(connection.ops.quote_name(field.column)
+                          for field in fields + rest)
+        placeholders = ', '.join(['%s'] * (len(fields) + len(rest)))
+        self.sql = (f'INSERT INTO {model._meta.db_table} ({names}) '
+                    f'VALUES ({placeholders})')
+
+    def write(self, *columns):
+        started = time.perf_counter()
+        rows = zip(*columns, *map(repeat, self.defaults))
+        for batch in batches(rows, self.batch_size):
+            self.cursor.executemany(self.sql, batch)
+            self.count += len(batch)
+        if self.report is not None:
+            self.report(self.model.__name__, self.count,
+                        time.perf_counter() - started)
+        return self.count
+
+
+@contextmanager
+def deferred_indexes(cursor, models):
+    """
+    Снимает индексы и триггеры таблиц на время загрузки и создаёт их
+    заново в конце: построить индекс по готовой таблице быстрее, чем
+    обновлять его на каждой строке. В полнотекстовые индексы, которые
+    вели триггеры, добавляются только новые строки.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    cursor.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE type IN ('index', 'trigger') AND sql IS NOT NULL "
+        f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})", tables)
+    objects = cursor.fetchall()
+    first_pks = {table: next_pk(model)
+                 for table, (model, _) in FTS_TABLES.items()}
+    for kind, name, _ in objects:
+        cursor.execute(
+            f'DROP {kind.upper()} {connection.ops.quote_name(name)}')
+    yield
+    for _, _, sql in objects:
+        cursor.execute(sql)
+    for table, (model, columns) in FTS_TABLES.items():
+        columns = ', '.join(columns)
+        cursor.execute(
+            f'INSERT INTO {table}(rowid, {columns}) '
+            f'SELECT id, {columns} FROM {model._meta.db_table} '
+            'WHERE id >= %s', [first_pks[table]])
+
+
+def generate_dataset(users, titles, genres, categories, reviews, comments,
+                     alpha=1.1, seed=None, batch_size=BATCH_SIZE,
+                     report=None):
+    """
+    Добавляет синтетические данные к существующим и возвращает
+    количество созданных строк по моделям. `report(model, rows, seconds)`
+    вызывается после записи каждой модели.
+    """
+    rng = random.Random(seed)
+    current_year = dt.date.today().year
+    now = timezone.now().replace(tzinfo=None)
+    texts = [sentence(rng) for _ in range(TEXT_POOL_SIZE)]
+    dates = sorted(
+        str(now - dt.timedelta(seconds=rng.uniform(
+            0, DATE_RANGE.total_seconds())))
+        for _ in range(DATE_POOL_SIZE))
+    created = {}
+
+    with connection.constraint_checks_disabled(), transaction.atomic(), \
+            connection.cursor() as cursor, \
+            deferred_indexes(cursor, BULK_MODELS):
+        def writer(model, columns):
+            return RowWriter(cursor, model, columns, batch_size, report)
+
+        start = next_pk(User)
+        user_ids = range(start, start + users)
+        # Имена одной длины идут в индексе по порядку ключей. Они
+        # заведомо проходят validate_name, поэтому не проверяются.
+        width = len(str(start + users))
+        usernames = [f'user{pk:0{width}}' for pk in user_ids]
+        created['User'] = writer(
+            User, ('id', 'username', 'email', 'date_joined')
+        ).write(
+            user_ids, usernames,
+            [f'{username}@example.com' for username in usernames],
+            choices(rng, dates, users),
+        )
+        del usernames
+
+        start = next_pk(Genre)
+        genre_ids = range(start, start + genres)
+        created['Genre'] = writer(Genre, ('id', 'name', 'slug')).write(
+            genre_ids, [f'Жанр {pk}' for pk in genre_ids],
+            [f'genre-{pk}' for pk in genre_ids])
+        start = next_pk(Category)
+        category_ids = range(start, start + categories)
+        created['Category'] = writer(
+            Category, ('id', 'name', 'slug')
+        ).write(category_ids, [f'Категория {pk}' for pk in category_ids],
+                [f'category-{pk}' for pk in category_ids])
+
+        first_title = next_pk(Title)
+        title_ids = range(first_title, first_title + titles)
+        descriptions = choices(rng, texts, titles)
+        created['Title'] = writer(
+            Title, ('id', 'name', 'year', 'description', 'category_id')
+        ).write(
+            title_ids,
+            [f'{text.split()[0]} {pk}'
+             for pk, text in zip(title_ids, descriptions)],
+            choices(rng, range(MIN_YEAR, current_year + 1), titles),
+            descriptions,
+            choices(rng, category_ids, titles) if categories else (),
+        )
+        genre_pairs = [
+            (pk, genre_id)
+            for pk, count in zip(title_ids, choices(
+                rng, range(1, min(MAX_GENRES_PER_TITLE, genres) + 1),
+                titles) if genres else ())
+            for genre_id in rng.sample(genre_ids, count)
+        ]
+        created['GenreTitle'] = writer(
+            GenreTitle, ('title_id', 'genre_id')
+        ).write(*zip(*genre_pairs) if genre_pairs else ((), ()))
+
+        popular = list(title_ids)
+        rng.shuffle(popular)
+        per_title = split_power_law(reviews, titles, alpha, users)
+        total = sum(per_title)
+        first_review = next_pk(Review)
+        review_ids = range(first_review, first_review + total)
+        scores = choices(rng, range(1, MAX_SCORE + 1), total)
+        commented = choices(rng, review_ids, comments if total else 0)
+        comment_counts = Counter(commented)
+        # Пара (автор, произведение) и оценка кодируются одним числом:
+        # список чисел сортируется быстро, а вставка по порядку автора
+        # дописывает индекс unique_review в конец, а не вразброс.
+        span = first_title + titles
+        keys = []
+        ratings = []
+        offset = 0
+        for title_id, count in zip(popular, per_title):
+            if not count:
+                break
+            title_scores = scores[offset:offset + count]
+            offset += count
+            ratings.append((sum(title_scores), count, title_id))
+            pairs = map(add, map(mul, spread(rng, users, count),
+                                 repeat(span)),
+                        repeat(user_ids.start * span + title_id))
+            keys.extend(map(add, map(mul, pairs, repeat(SCORE_SPAN)),
+                            title_scores))
+        del scores
+        keys.sort()
+        pairs = list(map(floordiv, keys, repeat(SCORE_SPAN)))
+        created['Review'] = writer(
+            Review, ('id', 'title_id', 'author_id', 'score', 'text',
+                     'pub_date', 'comment_count')
+        ).write(
+            review_ids, map(mod, pairs, repeat(span)),
+            map(floordiv, pairs, repeat(span)),
+            map(mod, keys, repeat(SCORE_SPAN)),
+            choices(rng, texts, total), choices(rng, dates, total),
+            map(comment_counts.__getitem__, review_ids),
+        )
+        del keys, pairs
+        cursor.executemany(
+            f'UPDATE {Title._meta.db_table} SET rating_sum = %s, '
+            'rating_count = %s WHERE id = %s', ratings)
+
+        created['Comment'] = writer(
+            Comment, ('review_id', 'author_id', 'text', 'pub_date')
+        ).write(
+            commented,
+            choices(rng, user_ids, comments) if users else (),
+            choices(rng, texts, comments),
+            choices(rng, dates, comments),
+        )
+    invalidate_all()
+    return created
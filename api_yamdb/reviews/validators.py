@@ -3,14 +3,20 @@ import re
 
 from rest_framework import serializers
 
+FORBIDDEN_USERNAME = 'me'
+USERNAME_PATTERN = re.compile(r'[a-zA-Z][a-zA-Z0-9-_\.]{1,20}')
+
+
+def get_invalid_name_chars(value):
+    return set(USERNAME_PATTERN.sub('', value))
+
 
 def validate_name(value):
-    if value == 'me':
+    if value == FORBIDDEN_USERNAME:
         raise serializers.ValidationError(
             "Это имя использовать запрещено!"
         )
-    result = re.sub('[a-zA-Z][a-zA-Z0-9-_\.]{1,20}', '', value)
-    result_set = set(result)
+    result_set = get_invalid_name_chars(value)
     if len(result_set) != 0:
         raise serializers.ValidationError(
             f'Недопустимые символы {result_set} в имени пользователя.'
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix,
+                                 tmp_path_factory):
+    """
+    Тестовая база SQLite в файле, а не в общей памяти: в режиме общего
+    кеша параллельные потоки получают блокировки таблиц вместо ожидания.
+    """
+    from django.conf import settings
+
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = str(
+        tmp_path_factory.mktemp('db') / 'test.sqlite3')
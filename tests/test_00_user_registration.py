@@ -103,6 +103,8 @@ class Test00UserRegistration:
         )
 
     def test_00_valid_data_user_signup(self, client, django_user_model):
+        from api.mail import deliver_batch
+
         outbox_before_count = len(mail.outbox)
         valid_data = {
             'email': 'valid@yamdb.fake',
@@ -110,6 +112,7 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.url_signup, data=valid_data)
+        deliver_batch()  # письма отправляются из очереди
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -151,6 +154,8 @@ class Test00UserRegistration:
     def test_00_valid_data_admin_create_user(self,
                                              admin_client,
                                              django_user_model):
+        from api.mail import deliver_batch
+
         outbox_before_count = len(mail.outbox)
         valid_data = {
             'email': 'valid@yamdb.fake',
@@ -159,6 +164,7 @@ class Test00UserRegistration:
         response = admin_client.post(
             self.url_admin_create_user, data=valid_data
         )
+        deliver_batch()
         outbox_after = mail.outbox
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_title(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_review_writes(self, client, admin_client,
+                                             user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        create_single_review(user_client, title_id, 'Плохо', 2)
+        response = create_single_review(moderator_client, title_id,
+                                        'Хорошо', 8)
+        assert self.get_title(client, title_id).get('rating') == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            f'создании отзыва через `{url}`.'
+        )
+
+        review_id = response.json()['id']
+        moderator_client.patch(f'{url}{review_id}/', data={'score': 10})
+        assert self.get_title(client, title_id).get('rating') == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            f'изменении оценки через `{url}<review_id>/`.'
+        )
+
+        moderator_client.delete(f'{url}{review_id}/')
+        assert self.get_title(client, title_id).get('rating') == 2, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            f'удалении отзыва через `{url}<review_id>/`.'
+        )
+
+    def test_02_rating_follows_cascade_delete(self, client, admin_client,
+                                              user, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Неплохо', 7)
+
+        user.delete()
+        assert self.get_title(client, title_id).get('rating') is None, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'каскадном удалении отзывов вместе с автором.'
+        )
+
+    def test_03_refresh_rating(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Отлично', 9)
+        Title.objects.update(rating_sum=0, rating_count=0)
+
+        Title.objects.refresh_rating()
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (9, 1), (
+            'Проверьте, что `Title.objects.refresh_rating()` пересчитывает '
+            'сохранённый рейтинг по таблице отзывов.'
+        )
+
+    def test_04_stale_writes_keep_counters_exact(self, admin_client,
+                                                 user_client,
+                                                 moderator_client):
+        from reviews.models import Comment, Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Плохо', 2)
+        review_id = create_single_review(
+            moderator_client, title_id, 'Хорошо', 8).json()['id']
+        first, second = (Review.objects.get(pk=review_id) for _ in range(2))
+        first.score = 10
+        first.save()
+        second.score = 4
+        second.save()
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (6, 2), (
+            'Проверьте, что после двух одновременных изменений оценки '
+            'рейтинг совпадает с оценками в таблице отзывов.'
+        )
+
+        review = Review.objects.get(pk=review_id)
+        comment = Comment.objects.create(
+            review=review, author=review.author, text='Комментарий')
+        Comment.objects.create(
+            review=review, author=review.author, text='Ещё комментарий')
+        Comment.objects.get(pk=comment.pk).delete()
+        comment.delete()
+        assert Review.objects.get(pk=review_id).comment_count == 1, (
+            'Проверьте, что повторное удаление уже удалённого комментария '
+            'не меняет счётчик комментариев.'
+        )
+
+        review.delete()
+        second.delete()
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (2, 1), (
+            'Проверьте, что повторное удаление уже удалённого отзыва не '
+            'меняет рейтинг произведения.'
+        )
@@ -0,0 +1,164 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_comment, create_titles
+
+
+def create_many_reviews(django_user_model, title_id, count):
+    from reviews.models import Review
+
+    for idx in range(count):
+        author = django_user_model.objects.create_user(
+            username=f'reader{idx}', email=f'reader{idx}@yamdb.fake'
+        )
+        Review.objects.create(
+            author=author, title_id=title_id, text=f'review {idx}', score=5
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09KeysetPagination:
+
+    def collect_pages(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    def test_01_walk_reviews_by_cursor(self, client, admin_client,
+                                       django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(django_user_model, titles[0]['id'], 7)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        expected = [
+            item['id'] for item in client.get(
+                f'{url}?page_size=100').json()['results']
+        ]
+        assert len(expected) == 7
+        assert self.collect_pages(client, f'{url}?page_size=2') == expected, (
+            f'Проверьте, что переход по ссылкам `next` для `{url}` '
+            'возвращает все отзывы ровно по одному разу и в исходном порядке.'
+        )
+
+        last_page = client.get(f'{url}?page_size=3')
+        while last_page.json()['next']:
+            last_page = client.get(last_page.json()['next'])
+        previous = client.get(last_page.json()['previous']).json()
+        assert [item['id'] for item in previous['results']] == expected[3:6], (
+            f'Проверьте, что ссылка `previous` для `{url}` возвращает '
+            'предыдущую страницу.'
+        )
+
+    def test_02_count_and_page_size(self, client, admin_client,
+                                    django_user_model, settings):
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(django_user_model, titles[0]['id'], 4)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        data = client.get(url).json()
+        assert data['count'] == 4
+        data = client.get(f'{url}?count=false').json()
+        assert 'count' not in data, (
+            f'Проверьте, что параметр `count=false` для `{url}` отключает '
+            'подсчёт общего количества записей.'
+        )
+
+        settings.PAGINATION_MAX_PAGE_SIZE = 3
+        data = client.get(f'{url}?page_size=50').json()
+        assert len(data['results']) == 3, (
+            f'Проверьте, что размер страницы для `{url}` ограничен '
+            'настройкой `PAGINATION_MAX_PAGE_SIZE`.'
+        )
+
+        response = client.get(f'{url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_deep_page_costs_as_first(self, client, admin_client,
+                                         django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(django_user_model, titles[0]['id'], 9)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?page_size=2'
+
+        with CaptureQueriesContext(connection) as first_page:
+            response = client.get(url)
+        next_url = response.json()['next']
+        for _ in range(3):
+            next_url = client.get(next_url).json()['next']
+        with CaptureQueriesContext(connection) as deep_page:
+            client.get(next_url)
+
+        assert len(deep_page) == len(first_page)
+        assert not any(
+            'OFFSET' in query['sql'] for query in deep_page.captured_queries
+        ), 'Глубокие страницы не должны использовать OFFSET.'
+
+    def test_04_titles_legacy_page_param(self, client, admin_client):
+        create_titles(admin_client)
+        data = client.get('/api/v1/titles/?page=1').json()
+        assert data['count'] == 2
+        assert data['next'] is None
+
+    def test_05_nested_count_from_parent(self, client, admin_client,
+                                         user_client, django_user_model):
+        from reviews.models import Comment, Review
+
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(django_user_model, titles[0]['id'], 3)
+        review = Review.objects.filter(title_id=titles[0]['id']).first()
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        for idx in range(4):
+            create_single_comment(
+                user_client, titles[0]['id'], review.pk, f'comment {idx}')
+        Comment.objects.filter(review=review).first().delete()
+
+        for url, expected in ((reviews_url, 3), (comments_url, 3)):
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            assert data['count'] == expected, (
+                f'Проверьте, что `count` для `{url}` совпадает с количеством '
+                'записей.'
+            )
+            assert not any(
+                'COUNT(' in query['sql'] for query in context.captured_queries
+            ), (
+                f'Проверьте, что `count` для `{url}` берётся из счётчика '
+                'родителя, а не из COUNT(*).'
+            )
+
+        data = client.get(reviews_url, {'search': 'review 1'}).json()
+        assert data['count'] == 1, (
+            'Проверьте, что при поиске `count` считается по найденным '
+            'записям.'
+        )
+
+    def test_06_cursor_values_of_wrong_type(self, client, admin_client,
+                                           django_user_model):
+        import json
+        from base64 import urlsafe_b64encode
+
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(django_user_model, titles[0]['id'], 3)
+        for url, position in (
+            (f'/api/v1/titles/{titles[0]["id"]}/reviews/', ['abc', 1]),
+            (f'/api/v1/titles/{titles[0]["id"]}/reviews/', [{'a': 1}, 1]),
+            (f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+             ['2020-01-01T00:00:00+00:00', 'x']),
+            ('/api/v1/titles/', ['abc', 'name', 1]),
+            ('/api/v1/titles/', [2000, ['name'], 1]),
+        ):
+            cursor = urlsafe_b64encode(
+                json.dumps({'r': 0, 'p': position}).encode()).decode()
+            response = client.get(url, {'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что курсор `{url}` со значением неподходящего '
+                'типа возвращает 404, а не ошибку сервера.'
+            )
@@ -0,0 +1,77 @@
+import pytest
+
+from tests.utils import (check_query_budget, create_single_comment,
+                         create_single_review, create_titles)
+
+# В каждый бюджет входит чтение версий коллекции из DataVersion.
+TITLE_LIST_QUERIES = 4
+TITLE_DETAIL_QUERIES = 3
+NESTED_LIST_QUERIES = 4
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10QueryBudget:
+
+    def add_titles(self, count):
+        from reviews.models import Category, Genre, Title
+
+        category = Category.objects.first()
+        genres = list(Genre.objects.all())
+        for idx in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category
+            )
+            title.genre.set(genres)
+
+    def test_01_title_list(self, client, admin_client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/?page_size=50'
+        check_query_budget(client, url, TITLE_LIST_QUERIES)
+
+        self.add_titles(20)
+        response = check_query_budget(client, url, TITLE_LIST_QUERIES)
+        assert len(response.json()['results']) == 22, (
+            'Проверьте, что количество SQL-запросов к `/api/v1/titles/` '
+            'не зависит от размера страницы.'
+        )
+
+    def test_02_title_detail(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        check_query_budget(
+            client, f'/api/v1/titles/{titles[0]["id"]}/', TITLE_DETAIL_QUERIES
+        )
+
+    def add_authors(self, django_user_model, count):
+        return [
+            django_user_model.objects.create_user(
+                username=f'reader{idx}', email=f'reader{idx}@yamdb.fake'
+            ) for idx in range(count)
+        ]
+
+    def test_03_review_list(self, client, admin_client, django_user_model):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?page_size=50'
+        for idx, author in enumerate(self.add_authors(django_user_model, 10)):
+            Review.objects.create(author=author, title_id=titles[0]['id'],
+                                  text=f'review {idx}', score=7)
+        response = check_query_budget(client, url, NESTED_LIST_QUERIES)
+        assert len(response.json()['results']) == 10
+
+    def test_04_comment_list(self, client, admin_client, user_client,
+                             django_user_model):
+        from reviews.models import Comment
+
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 5).json()
+        create_single_comment(
+            user_client, titles[0]['id'], review['id'], 'Комментарий')
+        for idx, author in enumerate(self.add_authors(django_user_model, 10)):
+            Comment.objects.create(author=author, review_id=review['id'],
+                                   text=f'comment {idx}')
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/'
+               'comments/?page_size=50')
+        response = check_query_budget(client, url, NESTED_LIST_QUERIES)
+        assert len(response.json()['results']) == 11
@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connections, transaction
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleCache:
+
+    def get(self, client, url):
+        response = client.get(url)
+        return response['X-Cache'], response.json()
+
+    def test_01_list_and_detail_are_cached(self, client, admin_client):
+        from api.cache import get_stats, reset_stats
+
+        titles, _, _ = create_titles(admin_client)
+        reset_stats()
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        assert self.get(client, '/api/v1/titles/')[0] == 'MISS'
+        assert self.get(client, '/api/v1/titles/')[0] == 'HIT', (
+            'Проверьте, что повторный GET-запрос к `/api/v1/titles/` '
+            'обслуживается из кеша.'
+        )
+        assert self.get(client, '/api/v1/titles/?year=1984')[0] == 'MISS'
+        assert self.get(client, '/api/v1/titles/?year=1984')[0] == 'HIT'
+        assert self.get(client, detail_url)[0] == 'MISS'
+        assert self.get(client, detail_url)[0] == 'HIT'
+        assert get_stats() == {'hits': 3, 'misses': 3, 'hit_ratio': 0.5}
+
+    def test_02_invalidated_by_review(self, client, admin_client,
+                                      user_client):
+        titles, _, _ = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        self.get(client, detail_url)
+        self.get(client, '/api/v1/titles/')
+
+        create_single_review(user_client, titles[0]['id'], 'Отлично', 9)
+        state, data = self.get(client, detail_url)
+        assert (state, data['rating']) == ('MISS', 9), (
+            'Проверьте, что кеш произведения сбрасывается после '
+            'добавления отзыва.'
+        )
+        assert self.get(client, '/api/v1/titles/')[0] == 'MISS'
+
+    def test_03_invalidated_by_catalog_changes(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        self.get(client, detail_url)
+
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        state, data = self.get(client, detail_url)
+        assert state == 'MISS'
+        assert genres[0] not in data['genre'], (
+            'Проверьте, что кеш произведения сбрасывается после '
+            'удаления жанра.'
+        )
+
+        admin_client.patch(detail_url, data={'genre': [genres[2]['slug']]})
+        state, data = self.get(client, detail_url)
+        assert (state, data['genre']) == ('MISS', [genres[2]])
+
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        self.get(client, other_url)
+        admin_client.patch(detail_url, data={'name': 'Новое название'})
+        assert self.get(client, other_url)[0] == 'HIT', (
+            'Изменение одного произведения не должно сбрасывать кеш '
+            'других произведений.'
+        )
+
+    def test_04_not_cached_before_commit(self, client, admin_client, user):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        self.get(client, detail_url)
+
+        def read():
+            try:
+                return self.get(client, detail_url)
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            Review.objects.create(author=user, title_id=titles[0]['id'],
+                                  text='Отлично', score=9)
+            with ThreadPoolExecutor(1) as executor:
+                _, data = executor.submit(read).result()
+            assert data['rating'] is None
+        state, data = self.get(client, detail_url)
+        assert (state, data['rating']) == ('MISS', 9), (
+            'Проверьте, что версии кеша сдвигаются после фиксации '
+            'транзакции и ответ, прочитанный до неё, не отдаётся из кеша.'
+        )
+
+    def test_05_stats_require_shared_cache(self, client, admin_client,
+                                           monkeypatch):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        from api import cache
+
+        create_titles(admin_client)
+        with pytest.raises(CommandError):
+            call_command('cachestats', stdout=StringIO())
+
+        monkeypatch.setattr(cache, 'SHARED_COUNTER_BACKENDS',
+                            (cache.get_cache_backend(),))
+        self.get(client, '/api/v1/titles/')
+        stdout = StringIO()
+        call_command('cachestats', stdout=stdout)
+        assert 'misses: 1' in stdout.getvalue(), (
+            'Проверьте, что `cachestats` показывает счётчики общего кеша.'
+        )
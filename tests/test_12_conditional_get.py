@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from django.db import connections, transaction
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles, run_manage)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag, f'Ответ на GET-запрос к `{url}` должен содержать ETag.'
+        assert response['Cache-Control'] == 'public, max-age=0'
+        assert 'Accept' in response['Vary']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert response['ETag'] == etag
+        return etag
+
+    def test_01_titles(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        etag = self.check_not_modified(client, '/api/v1/titles/')
+        response = client.get('/api/v1/titles/')
+        assert not response.has_header('Last-Modified'), (
+            'Last-Modified с точностью до секунды пропускает изменения '
+            'внутри одной секунды, ответ должен валидироваться только ETag.'
+        )
+        response = client.get(
+            '/api/v1/titles/',
+            HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2100 00:00:00 GMT')
+        assert response.status_code == HTTPStatus.OK
+
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                           data={'name': 'Новое название'})
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения произведения ETag списка '
+            '`/api/v1/titles/` меняется.'
+        )
+
+    def test_02_reviews_and_comments(self, client, admin_client,
+                                     user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 6).json()
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{review["id"]}/comments/'
+        create_single_comment(
+            user_client, titles[0]['id'], review['id'], 'Комментарий')
+
+        reviews_etag = self.check_not_modified(client, reviews_url)
+        comments_etag = self.check_not_modified(client, comments_url)
+
+        create_single_comment(
+            user_client, titles[0]['id'], review['id'], 'Ещё один')
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Новый комментарий не должен менять ETag списка отзывов.'
+        )
+
+        user.username = 'RenamedUser'
+        user.save()
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после смены имени автора ETag списка отзывов '
+            'меняется.'
+        )
+
+    def test_03_short_circuit_skips_queries(self, client, admin_client,
+                                            django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        # Единственный запрос — версии коллекции из DataVersion.
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_04_etag_not_issued_before_commit(self, client, admin_client,
+                                              user):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        def read():
+            try:
+                return client.get(url)['ETag']
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            Review.objects.create(author=user, title_id=titles[0]['id'],
+                                  text='Отзыв', score=5)
+            with ThreadPoolExecutor(1) as executor:
+                etag = executor.submit(read).result()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что ETag, выданный до фиксации транзакции, '
+            'перестаёт совпадать после неё.'
+        )
+        assert len(response.json()['results']) == 1
+
+    def test_05_validator_keys_required(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        from api.mixins import ConditionalGetMixin
+
+        with pytest.raises(ImproperlyConfigured):
+            type('NoKeysViewSet', (ConditionalGetMixin,), {})
+
+    def test_06_write_from_other_process(self, client, admin_client,
+                                         user_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Отзыв', 2)
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        title_url = f'/api/v1/titles/{title_id}/'
+        etag = self.check_not_modified(client, reviews_url)
+        client.get(title_url)
+        assert client.get(title_url)['X-Cache'] == 'HIT'
+
+        run_manage('shell', '-c', (
+            'from reviews.models import Review; '
+            f'Review.objects.create(author_id={admin.pk}, '
+            f'title_id={title_id}, text="Из другого процесса", score=10)'
+        ))
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что версии коллекций общие для всех процессов: '
+            'запись из другого процесса должна менять ETag.'
+        )
+        assert len(response.json()['results']) == 2
+        response = client.get(title_url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что запись из другого процесса сбрасывает кеш '
+            'ответов произведения.'
+        )
+        assert response.json()['rating'] == 6
@@ -0,0 +1,189 @@
+import csv
+import shutil
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb/static/data'
+
+
+def corrupt_review_score(data_dir, row_number):
+    path = data_dir / 'review.csv'
+    with open(path, encoding='utf-8') as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    rows[row_number]['score'] = 'десять'
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ImportCsv:
+
+    def test_01_import_in_batches(self, tmp_path):
+        from reviews.models import Review, Title
+
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        out = StringIO()
+        call_command('importcsv', data_dir=tmp_path, batch_size=10,
+                     commit_every=2, stdout=out)
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что `importcsv` сообщает о скорости загрузки.'
+        )
+        assert Review.objects.count() == 72
+        assert Title.objects.filter(rating_count__gt=0).exists(), (
+            'Проверьте, что после загрузки пересчитывается рейтинг.'
+        )
+        assert not (tmp_path / '.importcsv_state.json').exists()
+
+    def test_02_resume_after_failure(self, tmp_path):
+        from reviews.models import Review, User
+
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        corrupt_review_score(tmp_path, 45)
+        with pytest.raises(CommandError):
+            call_command('importcsv', data_dir=tmp_path, batch_size=10,
+                         commit_every=2, stdout=StringIO())
+        assert Review.objects.count() == 40, (
+            'Проверьте, что `importcsv` фиксирует загруженные транзакции '
+            'и откатывает только незавершённую.'
+        )
+
+        shutil.copy(DATA_DIR / 'review.csv', tmp_path / 'review.csv')
+        call_command('importcsv', data_dir=tmp_path, batch_size=10,
+                     commit_every=2, resume=True, stdout=StringIO())
+        assert Review.objects.count() == 72
+        assert User.objects.count() == 5
+
+    def test_03_import_order_follows_foreign_keys(self):
+        from reviews.management.commands.importcsv import (TABLES,
+                                                           get_import_order)
+        from reviews.models import (Category, Comment, Genre, GenreTitle,
+                                    Review, Title, User)
+
+        assert get_import_order(TABLES) == [
+            [User, Category, Genre], [Title], [Review, GenreTitle], [Comment]
+        ], (
+            'Проверьте, что порядок загрузки строится по внешним ключам '
+            'моделей и независимые таблицы попадают в одно поколение.'
+        )
+
+    def test_04_single_process_import(self, tmp_path):
+        from reviews.models import Comment, GenreTitle
+
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        call_command('importcsv', data_dir=tmp_path, jobs=1,
+                     stdout=StringIO())
+        assert Comment.objects.count() == 3
+        assert GenreTitle.objects.count() == 42
+
+    def test_05_sync_mode(self, tmp_path):
+        from reviews.models import Review
+
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        call_command('importcsv', data_dir=tmp_path, stdout=StringIO())
+        out = StringIO()
+        call_command('importcsv', data_dir=tmp_path, sync=True, stdout=out)
+        assert 'добавлено 0, обновлено 0' in out.getvalue(), (
+            'Повторная синхронизация тех же файлов не должна менять строки.'
+        )
+
+        path = tmp_path / 'review.csv'
+        with open(path, encoding='utf-8') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        rows[0]['score'] = '3'
+        removed = rows.pop(5)
+        rows.append(dict(rows[1], id='999', author_id='100', title_id='30'))
+        with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+
+        call_command('importcsv', data_dir=tmp_path, sync=True,
+                     delete_missing=True, stdout=StringIO())
+        assert Review.objects.get(pk=rows[0]['id']).score == 3
+        assert Review.objects.filter(pk=999).exists()
+        assert not Review.objects.filter(pk=removed['id']).exists(), (
+            'Проверьте, что `--delete-missing` удаляет строки, которых нет '
+            'в файле.'
+        )
+
+    def test_06_keeps_publication_dates(self, tmp_path):
+        from reviews.models import Review
+
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        call_command('importcsv', data_dir=tmp_path, stdout=StringIO())
+        assert Review.objects.get(pk=1).pub_date.year == 2019, (
+            'Проверьте, что `importcsv` сохраняет даты публикации из файла.'
+        )
+
+    def test_07_validation_report(self, tmp_path):
+        import json
+
+        from reviews.models import Review
+
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        path = tmp_path / 'review.csv'
+        with open(path, encoding='utf-8') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        rows[10]['score'] = '11'
+        rows[20]['author_id'] = '555'
+        with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+
+        with pytest.raises(CommandError):
+            call_command('importcsv', data_dir=tmp_path, validate_only=True,
+                         stdout=StringIO())
+        assert not Review.objects.exists(), (
+            'Проверьте, что `--validate-only` ничего не записывает в базу.'
+        )
+        report = [
+            json.loads(line) for line in
+            (tmp_path / 'importcsv_errors.jsonl').read_text().splitlines()
+        ]
+        assert {(item['file'], item['row'], item['code'])
+                for item in report} == {
+            ('review.csv', 11, 'out_of_range'),
+            ('review.csv', 21, 'missing_foreign_key'),
+        }, 'Проверьте содержимое отчёта об ошибках `importcsv`.'
+
+        with pytest.raises(CommandError):
+            call_command('importcsv', data_dir=tmp_path, stdout=StringIO())
+        call_command('importcsv', data_dir=tmp_path, resume=True,
+                     skip_invalid=True, stdout=StringIO())
+        assert Review.objects.count() == 70
+
+    def test_08_conversion_errors_in_report(self, tmp_path):
+        import json
+
+        from reviews.models import Review
+
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        corrupt_review_score(tmp_path, 45)
+        with pytest.raises(CommandError):
+            call_command('importcsv', data_dir=tmp_path, validate_only=True,
+                         jobs=1, stdout=StringIO())
+        report = [
+            json.loads(line) for line in
+            (tmp_path / 'importcsv_errors.jsonl').read_text().splitlines()
+        ]
+        assert [(item['file'], item['row'], item['column'], item['code'],
+                 item['value']) for item in report] == [
+            ('review.csv', 46, 'score', 'invalid', 'десять'),
+        ], (
+            'Проверьте, что `importcsv` записывает значения, которые не '
+            'приводятся к типу поля, в отчёт с кодом `invalid`.'
+        )
+
+        call_command('importcsv', data_dir=tmp_path, skip_invalid=True,
+                     stdout=StringIO())
+        assert Review.objects.count() == 71, (
+            'Проверьте, что `--skip-invalid` пропускает строки со '
+            'значениями, которые не приводятся к типу поля.'
+        )
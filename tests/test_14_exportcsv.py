@@ -0,0 +1,67 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb/static/data'
+
+
+def snapshot():
+    from reviews.management.commands.importcsv import TABLES
+
+    return {
+        model.__name__: sorted(model.objects.values_list())
+        for model in TABLES
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ExportCsv:
+
+    def test_01_round_trip(self, tmp_path, admin):
+        from reviews.management.commands.importcsv import TABLES
+
+        call_command('importcsv', data_dir=DATA_DIR, stdout=StringIO())
+        before = snapshot()
+        call_command('exportcsv', output_dir=tmp_path, gzip=True,
+                     chunk_size=7, stdout=StringIO())
+        assert {path.name for path in tmp_path.iterdir()} == {
+            f'{csv_f}.gz' for csv_f in TABLES.values()
+        }
+
+        for model in reversed(list(TABLES)):
+            model.objects.all().delete()
+        call_command('importcsv', data_dir=tmp_path, stdout=StringIO())
+        assert snapshot() == before, (
+            'Проверьте, что выгрузка `exportcsv` загружается обратно '
+            '`importcsv` без потерь.'
+        )
+
+    def test_02_ndjson(self, tmp_path):
+        call_command('importcsv', data_dir=DATA_DIR, stdout=StringIO())
+        call_command('exportcsv', output_dir=tmp_path, format='ndjson',
+                     stdout=StringIO())
+        lines = (tmp_path / 'review.ndjson').read_text().splitlines()
+        assert len(lines) == 72
+        review = json.loads(lines[0])
+        assert review['id'] == 1
+        assert review['pub_date'].startswith('2019-09-24T21:08:21')
+        assert not list(tmp_path.glob('*.gz'))
+
+    def test_03_ndjson_round_trip(self, tmp_path, admin):
+        from reviews.management.commands.importcsv import TABLES
+
+        call_command('importcsv', data_dir=DATA_DIR, stdout=StringIO())
+        before = snapshot()
+        call_command('exportcsv', output_dir=tmp_path, format='ndjson',
+                     gzip=True, stdout=StringIO())
+
+        for model in reversed(list(TABLES)):
+            model.objects.all().delete()
+        call_command('importcsv', data_dir=tmp_path, stdout=StringIO())
+        assert snapshot() == before, (
+            'Проверьте, что выгрузка `exportcsv --format ndjson` '
+            'загружается обратно `importcsv` без потерь.'
+        )
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15FullTextSearch:
+
+    def search(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return [item['id'] for item in response.json()['results']]
+
+    def test_01_titles_ranked_by_bm25(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        admin_client.patch(detail_url, data={
+            'description': 'Полицейский против террористов. Терминатор тут '
+                           'ни при чём.'
+        })
+
+        ids = self.search(client, '/api/v1/titles/?search=ТЕРМИНАТ')
+        assert ids == [titles[0]['id'], titles[1]['id']], (
+            'Проверьте, что `?search=` для `/api/v1/titles/` находит '
+            'произведения по началу слова без учёта регистра и ставит '
+            'совпадение в названии выше совпадения в описании.'
+        )
+        assert self.search(
+            client, '/api/v1/titles/?search=орешек полицейский'
+        ) == [titles[1]['id']]
+        assert self.search(client, '/api/v1/titles/?search=Рэмбо') == []
+        assert self.search(client, '/api/v1/titles/?search="*') == []
+
+        admin_client.patch(detail_url, data={'name': 'Die Hard'})
+        assert self.search(client, '/api/v1/titles/?search=орешек') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+
+    def test_02_reviews_search_and_pagination(self, admin_client,
+                                              user_client,
+                                              moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        first = create_single_review(
+            user_client, titles[0]['id'], 'Лучший фильм о машинах', 10
+        ).json()
+        second = create_single_review(
+            moderator_client, titles[0]['id'],
+            'Машины, машины и снова машины', 3
+        ).json()
+
+        with CaptureQueriesContext(connection) as context:
+            ids = self.search(admin_client, f'{url}?search=машин')
+        assert ids == [second['id'], first['id']]
+        assert not any(
+            'LIKE' in query['sql'] for query in context.captured_queries
+        ), 'Поиск по отзывам не должен использовать LIKE.'
+
+        page = admin_client.get(
+            url, {'search': 'машин', 'page_size': 1}).json()
+        assert [item['id'] for item in page['results']] == [second['id']]
+        assert self.search(admin_client, page['next']) == [first['id']], (
+            'Проверьте, что результаты поиска разбиваются на страницы '
+            'курсором в порядке релевантности.'
+        )
+
+        admin_client.delete(f'{url}{second["id"]}/')
+        assert self.search(admin_client, f'{url}?search=машин') == [
+            first['id']]
+
@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16UserSearch:
+
+    def search(self, admin_client, query):
+        response = admin_client.get('/api/v1/users/', {'search': query})
+        return sorted(user['username'] for user in response.json()['results'])
+
+    def test_01_containment_and_prefix(self, admin_client,
+                                       django_user_model):
+        for username in ('alice', 'malice', 'Bob', 'bobby', 'carol'):
+            django_user_model.objects.create_user(
+                username=username, email=f'{username}@yamdb.fake'
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            found = self.search(admin_client, 'LIC')
+        assert found == ['alice', 'malice'], (
+            'Проверьте, что `/api/v1/users/?search=` находит пользователей '
+            'по вхождению строки в `username` без учёта регистра.'
+        )
+        assert not any(
+            'LIKE' in query['sql'] for query in context.captured_queries
+        ), 'Поиск пользователей не должен использовать LIKE.'
+        assert self.search(admin_client, 'bo') == ['Bob', 'bobby']
+        assert self.search(admin_client, 'OB') == ['Bob', 'bobby'], (
+            'Проверьте, что короткие слова поиска ищутся по вхождению в '
+            '`username`, а не только по началу имени.'
+        )
+        assert self.search(admin_client, 'al') == ['alice', 'malice']
+        assert self.search(admin_client, 'ali mal') == ['malice']
+        assert self.search(admin_client, 'zzz') == []
+
+        user = django_user_model.objects.get(username='carol')
+        user.username = 'caroline'
+        user.save()
+        assert self.search(admin_client, 'olin') == ['caroline'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'имени пользователя.'
+        )
+
+    def test_02_short_terms_scan_index(self, django_user_model):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from api.filters import UsernameSearchFilter
+
+        request = Request(
+            APIRequestFactory().get('/api/v1/users/', {'search': 'ob'}))
+        queryset = UsernameSearchFilter().filter_queryset(
+            request, django_user_model.objects.all(), None)
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        assert 'COVERING INDEX' in plan, (
+            'Проверьте, что короткие слова поиска просматривают индекс '
+            'имён, а не таблицу пользователей.'
+        )
@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ReferenceCache:
+
+    def test_01_lists_served_from_memory(self, client, admin_client):
+        genres = create_genre(admin_client)
+        client.get('/api/v1/genres/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/genres/')
+        assert response.json()['count'] == len(genres)
+        assert len(context) == 0, (
+            'Проверьте, что повторный GET-запрос к `/api/v1/genres/` '
+            'обслуживается из памяти без запросов к базе.'
+        )
+        data = client.get('/api/v1/genres/', {'search': 'ДРАМ'}).json()
+        assert [genre['slug'] for genre in data['results']] == ['drama']
+
+        admin_client.post('/api/v1/genres/',
+                          data={'name': 'Вестерн', 'slug': 'western'})
+        assert client.get('/api/v1/genres/').json()['count'] == (
+            len(genres) + 1
+        ), 'Проверьте, что снимок жанров сбрасывается после создания жанра.'
+        admin_client.delete('/api/v1/genres/western/')
+        assert client.get('/api/v1/genres/').json()['count'] == len(genres)
+
+    def test_02_slugs_resolved_without_queries(self, admin_client):
+        from reviews.models import Genre
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        admin_client.get('/api/v1/genres/')
+        admin_client.get('/api/v1/categories/')
+        data = {
+            'name': 'Поворот не туда',
+            'year': 2000,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[0]['slug'],
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any(
+            '"slug" =' in query['sql'] for query in context.captured_queries
+        ), 'Слаги жанров и категорий должны разрешаться без запросов к базе.'
+
+        Genre.objects.filter(slug='drama').delete()
+        data['genre'] = ['drama']
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что удалённый жанр больше не принимается при '
+            'создании произведения.'
+        )
+
+    def test_03_other_process_snapshot(self, admin_client, settings):
+        from api.reference import ReferenceSnapshot
+        from reviews.models import Genre
+
+        genres = create_genre(admin_client)
+        # Снимок другого процесса: сигналы этого процесса его не сбрасывают.
+        snapshot = ReferenceSnapshot(Genre)
+        settings.REFERENCE_CHECK_INTERVAL = 60
+        assert len(snapshot.all()) == len(genres)
+
+        Genre.objects.create(name='Вестерн', slug='western')
+        assert len(snapshot.all()) == len(genres)
+        assert list(snapshot.get_many(['western'])) == ['western'], (
+            'Проверьте, что слаг, которого нет в снимке, ищется в базе '
+            'перед ошибкой валидации.'
+        )
+        settings.REFERENCE_CHECK_INTERVAL = 0
+        assert len(snapshot.all()) == len(genres) + 1
+
+        Genre.objects.filter(slug='western').delete()
+        assert len(snapshot.all()) == len(genres), (
+            'Проверьте, что снимок сверяет версию каталога в базе, общую '
+            'для всех процессов.'
+        )
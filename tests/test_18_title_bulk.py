@@ -0,0 +1,131 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+URL = '/api/v1/titles/bulk/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18TitleBulk:
+
+    def make_items(self, genres, categories, count):
+        return [{
+            'name': f'Произведение {idx}',
+            'year': 1900 + idx % 100,
+            'description': f'Описание {idx}',
+            'genre': [genres[idx % 3]['slug'], genres[(idx + 1) % 3]['slug']],
+            'category': categories[idx % 2]['slug'],
+        } for idx in range(count)]
+
+    def test_01_bulk_create(self, admin_client, user_client):
+        from reviews.models import GenreTitle, Title
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        items = self.make_items(genres, categories, 300)
+
+        response = user_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{URL}` со '
+            'списком корректных произведений возвращает ответ со статусом 201.'
+        )
+        assert len(context) < 30, (
+            f'Проверьте, что `{URL}` вставляет произведения и жанры пачками, '
+            'а не по одному.'
+        )
+        data = response.json()
+        assert [title['name'] for title in data] == [
+            item['name'] for item in items]
+        assert Title.objects.count() == 300
+        assert GenreTitle.objects.count() == 600
+        title = admin_client.get(f'/api/v1/titles/{data[7]["id"]}/').json()
+        assert title['year'] == 1907
+        assert [genre['slug'] for genre in title['genre']] == sorted(
+            items[7]['genre'], key=lambda slug: {
+                genre['slug']: genre['name'] for genre in genres}[slug])
+        assert title['category']['slug'] == items[7]['category']
+
+    def test_02_invalid_items_rollback(self, admin_client):
+        from reviews.models import Title
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        items = self.make_items(genres, categories, 3)
+        items[1]['year'] = 3000
+        items[2]['genre'] = ['unknown']
+
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert errors[0] == {}
+        assert 'year' in errors[1] and 'genre' in errors[2], (
+            f'Проверьте, что `{URL}` возвращает ошибки для каждого '
+            'произведения отдельно.'
+        )
+        assert not Title.objects.exists()
+
+        response = admin_client.post(URL, data={'name': 'x'}, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_bulk_update(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        created = admin_client.post(
+            URL, data=self.make_items(genres, categories, 3), format='json'
+        ).json()
+        detail_url = f'/api/v1/titles/{created[0]["id"]}/'
+        client.get(detail_url)
+
+        response = admin_client.patch(URL, data=[
+            {'id': created[0]['id'], 'name': 'Новое имя',
+             'genre': [genres[2]['slug']]},
+            {'id': created[2]['id'], 'year': 2001},
+        ], format='json')
+        assert response.status_code == HTTPStatus.OK
+        first = client.get(detail_url).json()
+        assert first['name'] == 'Новое имя', (
+            'Проверьте, что массовое обновление сбрасывает кеш произведений.'
+        )
+        assert [genre['slug'] for genre in first['genre']] == [
+            genres[2]['slug']]
+        third = client.get(f'/api/v1/titles/{created[2]["id"]}/').json()
+        assert third['year'] == 2001
+        assert third['name'] == created[2]['name']
+        assert len(third['genre']) == 2
+
+        response = admin_client.patch(
+            URL, data=[{'id': 0, 'name': 'Нет такого'}], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'id' in response.json()[0]
+
+    def test_04_duplicates_in_request(self, admin_client):
+        from reviews.models import GenreTitle
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        items = self.make_items(genres, categories, 1)
+        items[0]['genre'] = [genres[0]['slug'], genres[0]['slug']]
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        title_id = response.json()[0]['id']
+        assert GenreTitle.objects.filter(title_id=title_id).count() == 1, (
+            'Проверьте, что повторённый в `genre` слаг не создаёт '
+            'повторных связей произведения с жанром.'
+        )
+
+        response = admin_client.patch(URL, data=[
+            {'id': title_id, 'name': 'Первое имя'},
+            {'id': title_id, 'name': 'Второе имя'},
+        ], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что массовое обновление отклоняет повторный `id`.'
+        )
+        assert response.json()[0] == {} and 'id' in response.json()[1]
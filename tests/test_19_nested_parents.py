@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+def parent_selects(context, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19NestedParents:
+
+    def test_01_title_resolved_once(self, client, admin_client,
+                                    user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        with CaptureQueriesContext(connection) as context:
+            review = create_single_review(
+                user_client, titles[0]['id'], 'Текст', 7).json()
+        selects = parent_selects(context, 'reviews_title')
+        assert len(selects) == 1 and 'LIMIT 1' in selects[0], (
+            f'Проверьте, что при POST-запросе к `{url}` произведение '
+            'проверяется одним запросом на существование.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}{review["id"]}/')
+        assert response.status_code == HTTPStatus.OK
+        assert not parent_selects(context, 'reviews_title'), (
+            f'Проверьте, что GET-запрос к `{url}{{review_id}}/` не '
+            'загружает произведение.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert len(parent_selects(context, 'reviews_title')) == 1
+
+    def test_02_missing_parents(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Текст', 7).json()
+        other = titles[1]['id']
+        assert client.get(
+            '/api/v1/titles/999/reviews/').status_code == HTTPStatus.NOT_FOUND
+        assert user_client.post(
+            '/api/v1/titles/999/reviews/', data={'text': 'Текст', 'score': 5}
+        ).status_code == HTTPStatus.NOT_FOUND
+        assert client.get(
+            f'/api/v1/titles/{other}/reviews/{review["id"]}/'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+        comments_url = (
+            f'/api/v1/titles/{other}/reviews/{review["id"]}/comments/')
+        assert client.get(comments_url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии отзыва недоступны по адресу '
+            'другого произведения.'
+        )
+        assert user_client.post(
+            comments_url, data={'text': 'Комментарий'}
+        ).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Barrier
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tests.utils import create_single_review, create_titles
+
+THREADS = 8
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ReviewConstraint:
+
+    def test_01_duplicate_without_precheck(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        with CaptureQueriesContext(connection) as context:
+            create_single_review(user_client, titles[0]['id'], 'Текст', 7)
+        assert not any(
+            query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+            for query in context.captured_queries
+        ), (
+            f'Проверьте, что POST-запрос к `{url}` не проверяет повторный '
+            'отзыв отдельным запросом до вставки.'
+        )
+
+        response = user_client.post(url, data={'text': 'Ещё', 'score': 1})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'non_field_errors': [
+            'Нельзя оставить отзыв к одному произведению дважды.'
+        ]}
+
+    def test_02_concurrent_duplicates(self, admin_client, token_user):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        barrier = Barrier(THREADS)
+
+        def post(idx):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}')
+            barrier.wait()
+            try:
+                return client.post(
+                    url, data={'text': f'Отзыв {idx}', 'score': 5 + idx % 5}
+                ).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            statuses = sorted(executor.map(post, range(THREADS)))
+        assert statuses == (
+            [HTTPStatus.CREATED] + [HTTPStatus.BAD_REQUEST] * (THREADS - 1)
+        ), (
+            'Проверьте, что из одновременных POST-запросов одного '
+            'пользователя создаётся ровно один отзыв, а остальные получают '
+            'ответ 400.'
+        )
+        review = Review.objects.get()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (review.score, 1)
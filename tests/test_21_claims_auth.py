@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+GENRES_URL = '/api/v1/genres/'
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+def make_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ClaimsAuth:
+
+    def get_token(self, client, user):
+        from reviews.models import ConfirmationCode
+
+        ConfirmationCode.objects.issue(user, '1234')
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username, 'confirmation_code': '1234'
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        return response.json()['token']
+
+    def test_01_writes_without_user_query(self, client, admin):
+        admin_client = make_client(self.get_token(client, admin))
+        admin_client.get(GENRES_URL)
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                GENRES_URL, data={'name': 'Вестерн', 'slug': 'western'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert not user_queries(context), (
+            'Проверьте, что токен из `/api/v1/auth/token/` содержит роль '
+            'пользователя и после первого запроса версия утверждений '
+            'берётся из кеша.'
+        )
+
+        response = admin_client.get('/api/v1/users/me/')
+        assert response.json()['email'] == admin.email
+
+    def test_02_role_change_revokes_claims(self, client, admin):
+        admin_client = make_client(self.get_token(client, admin))
+        admin.role = 'user'
+        admin.save()
+        response = admin_client.post(
+            GENRES_URL, data={'name': 'Вестерн', 'slug': 'western'})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что после смены роли старый токен не даёт прежних '
+            'прав.'
+        )
+
+        admin.is_active = False
+        admin.save()
+        response = admin_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен деактивированного пользователя '
+            'отклоняется.'
+        )
+
+    def test_03_legacy_token_cached(self, user):
+        user_client = make_client(AccessToken.for_user(user))
+        user_client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                GENRES_URL, data={'name': 'Вестерн', 'slug': 'western'})
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        assert not user_queries(context), (
+            'Проверьте, что пользователь из токена без утверждений '
+            'кешируется после первого запроса.'
+        )
+
+    def test_04_revocation_survives_cache_eviction(self, client, admin):
+        from reviews.models import User
+
+        admin_client = make_client(self.get_token(client, admin))
+        admin.role = 'user'
+        admin.save()
+        cache.clear()
+        response = admin_client.post(
+            GENRES_URL, data={'name': 'Вестерн', 'slug': 'western'})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что отзыв утверждений хранится в базе и не '
+            'теряется при вытеснении кеша.'
+        )
+
+        admin.role = 'admin'
+        admin.save()
+        admin_client = make_client(self.get_token(client, admin))
+        User.objects.filter(pk=admin.pk).update(role='user')
+        cache.clear()
+        response = admin_client.post(
+            GENRES_URL, data={'name': 'Вестерн', 'slug': 'western'})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что `QuerySet.update()` роли тоже отзывает '
+            'утверждения выданных токенов.'
+        )
+
+    def test_05_claims_version_changes(self, admin):
+        from reviews.models import User
+
+        version = admin.claims_version
+        admin.bio = 'Без изменения прав'
+        admin.save()
+        assert User.objects.get(pk=admin.pk).claims_version == version, (
+            'Проверьте, что версия утверждений не меняется без изменения '
+            'роли и флагов.'
+        )
+        admin.role = 'moderator'
+        admin.save(update_fields=['role'])
+        User.objects.filter(pk=admin.pk).update(is_staff=False)
+        assert User.objects.get(pk=admin.pk).claims_version == version + 2, (
+            'Проверьте, что `save()` и `update()` роли и флагов '
+            'увеличивают версию утверждений.'
+        )
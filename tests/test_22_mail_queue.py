@@ -0,0 +1,106 @@
+from http import HTTPStatus
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+class FlakyBackend(EmailBackend):
+    opened = 0
+    failures = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise SMTPServerDisconnected('Соединение разорвано')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22MailQueue:
+
+    @pytest.fixture(autouse=True)
+    def queue_settings(self, settings):
+        settings.EMAIL_QUEUE_ENABLED = True
+        settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+        FlakyBackend.opened = 0
+        FlakyBackend.failures = 0
+
+    def signup(self, client, count):
+        for idx in range(count):
+            response = client.post(SIGNUP_URL, data={
+                'username': f'reader{idx}', 'email': f'reader{idx}@yamdb.fake'
+            })
+            assert response.status_code == HTTPStatus.OK
+
+    def test_01_signup_enqueues(self, client):
+        from reviews.models import OutgoingMail
+
+        self.signup(client, 3)
+        assert not mail.outbox, (
+            f'Проверьте, что POST-запрос к `{SIGNUP_URL}` только ставит '
+            'письмо в очередь, не отправляя его.'
+        )
+        assert OutgoingMail.objects.filter(sent_at__isnull=True).count() == 3
+
+        call_command('sendqueuedmail', once=True, stdout=StringIO())
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            f'reader{idx}@yamdb.fake' for idx in range(3)
+        ]
+        assert FlakyBackend.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение.'
+        )
+        assert not OutgoingMail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_02_retry_with_backoff(self, client, settings):
+        from api.mail import deliver_batch
+        from reviews.models import OutgoingMail
+
+        self.signup(client, 2)
+        FlakyBackend.failures = 1
+        assert deliver_batch() == (1, 1)
+        failed = OutgoingMail.objects.get(sent_at__isnull=True)
+        assert failed.attempts == 1
+        assert 'Соединение разорвано' in failed.last_error
+        assert deliver_batch() == (0, 0), (
+            'Проверьте, что неудачное письмо повторяется только после '
+            'задержки.'
+        )
+
+        settings.EMAIL_QUEUE_RETRY_DELAY = 0
+        OutgoingMail.objects.filter(pk=failed.pk).update(
+            send_after=failed.created_at)
+        FlakyBackend.failures = 1
+        assert deliver_batch() == (0, 1)
+        assert OutgoingMail.objects.get(pk=failed.pk).attempts == 2
+        settings.EMAIL_QUEUE_MAX_ATTEMPTS = 2
+        assert deliver_batch() == (0, 0)
+        settings.EMAIL_QUEUE_MAX_ATTEMPTS = 5
+        assert deliver_batch() == (1, 0)
+        assert len(mail.outbox) == 2
+
+    def test_03_purge_expired(self, client, settings):
+        from reviews.models import OutgoingMail
+
+        self.signup(client, 2)
+        call_command('sendqueuedmail', once=True, stdout=StringIO())
+        assert OutgoingMail.objects.count() == 2
+        OutgoingMail.objects.filter(
+            recipients='reader0@yamdb.fake'
+        ).update(sent_at=timezone.now() - settings.EMAIL_QUEUE_RETENTION)
+        call_command('sendqueuedmail', once=True, stdout=StringIO())
+        assert list(OutgoingMail.objects.values_list(
+            'recipients', flat=True)) == ['reader1@yamdb.fake'], (
+            'Проверьте, что `sendqueuedmail` удаляет отправленные письма '
+            'старше `EMAIL_QUEUE_RETENTION`.'
+        )
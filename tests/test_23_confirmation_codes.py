@@ -0,0 +1,80 @@
+import datetime as dt
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ConfirmationCodes:
+
+    def signup(self, client):
+        from reviews.models import ConfirmationCode
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(SIGNUP_URL, data={
+                'username': 'reader', 'email': 'reader@yamdb.fake'
+            })
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            query['sql'].startswith('UPDATE "reviews_user"')
+            for query in context.captured_queries
+        ), (
+            f'Проверьте, что POST-запрос к `{SIGNUP_URL}` не переписывает '
+            'строку пользователя.'
+        )
+        return ConfirmationCode.objects.get(user__username='reader')
+
+    def test_01_code_is_single_use(self, client):
+        first = self.signup(client)
+        second = self.signup(client)
+        data = {'username': 'reader', 'confirmation_code': first.code}
+        if first.code != second.code:
+            response = client.post(TOKEN_URL, data=data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что повторная регистрация заменяет прежний код.'
+            )
+
+        data['confirmation_code'] = second.code
+        assert client.post(
+            TOKEN_URL, data=data).status_code == HTTPStatus.CREATED
+        assert client.post(
+            TOKEN_URL, data=data).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что код подтверждения можно использовать один раз.'
+        )
+
+    def test_02_expired_codes(self, client):
+        from reviews.models import ConfirmationCode
+
+        code = self.signup(client)
+        ConfirmationCode.objects.update(
+            expires_at=timezone.now() - dt.timedelta(seconds=1))
+        response = client.post(TOKEN_URL, data={
+            'username': 'reader', 'confirmation_code': code.code
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что просроченный код подтверждения не принимается.'
+        )
+        call_command('clearexpiredcodes', stdout=StringIO())
+        assert not ConfirmationCode.objects.exists()
+
+    def test_03_profile_update_writes_changed_fields(self, user_client):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(
+                '/api/v1/users/me/', data={'bio': 'Новая биография'})
+        assert response.json()['bio'] == 'Новая биография'
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_user"')
+        ]
+        assert len(updates) == 1 and '"password"' not in updates[0], (
+            'Проверьте, что изменение профиля записывает только '
+            'переданные поля.'
+        )
@@ -0,0 +1,121 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.conf import settings
+from django.db import OperationalError, connection
+
+from api_yamdb.sqlite3.base import DatabaseWrapper
+
+READ_LIMIT = 1
+
+
+def make_wrapper(path, pragmas, **options):
+    settings_dict = copy.deepcopy(connection.settings_dict)
+    settings_dict.update({
+        'NAME': str(path),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'pragmas': pragmas, **options},
+    })
+    return DatabaseWrapper(settings_dict)
+
+
+def read_count(path, pragmas):
+    reader = make_wrapper(path, pragmas)
+    try:
+        started = time.monotonic()
+        with reader.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            count = cursor.fetchone()[0]
+        return count, time.monotonic() - started
+    finally:
+        reader.close()
+
+
+def hold_write_lock(path, pragmas):
+    writer = make_wrapper(path, pragmas)
+    with writer.cursor() as cursor:
+        cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        cursor.execute('INSERT INTO item DEFAULT VALUES')
+        cursor.execute('BEGIN EXCLUSIVE')
+        cursor.execute('INSERT INTO item DEFAULT VALUES')
+    return writer
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24SqliteProfile:
+
+    def test_01_pragmas(self, tmp_path):
+        wrapper = make_wrapper(
+            tmp_path / 'db.sqlite3', settings.SQLITE_PRODUCTION_PRAGMAS)
+        expected = {
+            'journal_mode': 'wal',
+            'busy_timeout': 5000,
+            'synchronous': 1,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+            'temp_store': 2,
+        }
+        with wrapper.cursor() as cursor:
+            for name, value in expected.items():
+                cursor.execute(f'PRAGMA {name}')
+                assert cursor.fetchone()[0] == value, (
+                    f'Проверьте, что профиль production задаёт PRAGMA {name}.'
+                )
+        wrapper.close()
+
+    def test_02_readers_do_not_wait_for_writer(self, tmp_path):
+        path = tmp_path / 'db.sqlite3'
+        pragmas = settings.SQLITE_PRODUCTION_PRAGMAS
+        writer = hold_write_lock(path, pragmas)
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(
+                    lambda _: read_count(path, pragmas), range(4)))
+        finally:
+            writer.cursor().execute('ROLLBACK')
+            writer.close()
+        for count, elapsed in results:
+            assert count == 1, (
+                'Проверьте, что читатель в режиме WAL видит последнюю '
+                'зафиксированную версию данных.'
+            )
+            assert elapsed < READ_LIMIT, (
+                'Проверьте, что в режиме WAL чтение не ждёт открытой '
+                'транзакции записи.'
+            )
+
+    def test_03_rollback_journal_blocks_readers(self, tmp_path):
+        path = tmp_path / 'db.sqlite3'
+        pragmas = {'busy_timeout': 100}
+        writer = hold_write_lock(path, pragmas)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                with pytest.raises(OperationalError):
+                    executor.submit(read_count, path, pragmas).result()
+        finally:
+            writer.cursor().execute('ROLLBACK')
+            writer.close()
+
+    def test_04_persistent_connection_health_check(self, tmp_path):
+        path = tmp_path / 'db.sqlite3'
+        wrapper = make_wrapper(path, {}, health_checks=True)
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+
+        wrapper.close_if_unusable_or_obsolete()
+        assert wrapper.connection is raw, (
+            'Проверьте, что исправное соединение остаётся открытым между '
+            'запросами при CONN_MAX_AGE.'
+        )
+
+        raw.close()
+        wrapper.close_if_unusable_or_obsolete()
+        assert wrapper.connection is None, (
+            'Проверьте, что неисправное постоянное соединение закрывается '
+            'перед следующим запросом.'
+        )
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        wrapper.close()
@@ -0,0 +1,127 @@
+import copy
+from http import HTTPStatus
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tests.utils import create_single_review, create_titles, run_manage
+
+REPLICA = 'replica_test'
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    settings_dict = copy.deepcopy(connection.settings_dict)
+    settings_dict['NAME'] = str(tmp_path / 'replica.sqlite3')
+    connections.settings[REPLICA] = settings_dict
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield connections[REPLICA]
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.settings[REPLICA]
+
+
+def get_served_by(client, url):
+    with CaptureQueriesContext(connection) as primary, \
+            CaptureQueriesContext(connections[REPLICA]) as replica:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    # Метка копии читается из реплики всегда, важны запросы данных.
+    served_by = {
+        alias for alias, context in (
+            (DEFAULT_DB_ALIAS, primary), (REPLICA, replica))
+        if any('reviews_dataversion' not in query['sql']
+               for query in context.captured_queries)
+    }
+    return served_by, response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Replicas:
+
+    def test_01_reads_go_to_replica(self, client, admin_client, user_client,
+                                    replica):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Текст', 7)
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+        )
+        served_by, _ = get_served_by(client, urls[-1])
+        assert served_by == {DEFAULT_DB_ALIAS}, (
+            'Проверьте, что реплика без копии базы не используется.'
+        )
+
+        # Реплику копирует отдельный процесс, как в продакшене.
+        run_manage('syncreplicas', '--once',
+                   DB_REPLICAS=replica.settings_dict['NAME'])
+        for url in urls:
+            served_by, _ = get_served_by(client, url)
+            assert served_by == {REPLICA}, (
+                f'Проверьте, что GET-запрос к `{url}` читает данные из '
+                'реплики.'
+            )
+        assert router.db_for_write(Title) == DEFAULT_DB_ALIAS
+
+    def test_02_writer_reads_own_writes(self, client, admin_client,
+                                        user_client, user, replica):
+        from api.replicas import PIN_COOKIE, sync_replicas
+
+        titles, _, _ = create_titles(admin_client)
+        sync_replicas()
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Текст', 7).json()
+
+        served_by, data = get_served_by(user_client, url)
+        assert served_by == {DEFAULT_DB_ALIAS}, (
+            'Проверьте, что после записи пользователь читает из основной '
+            'базы.'
+        )
+        assert [item['id'] for item in data['results']] == [review['id']], (
+            'Проверьте, что автор сразу видит свой новый отзыв.'
+        )
+
+        served_by, data = get_served_by(client, url)
+        assert served_by == {DEFAULT_DB_ALIAS}
+        assert data['results'], (
+            'Проверьте, что ответ с версией новее копии реплики не '
+            'читается из реплики.'
+        )
+
+        assert PIN_COOKIE in user_client.cookies, (
+            'Проверьте, что закрепление за основной базой хранится в '
+            'подписанной cookie и видно любому процессу.'
+        )
+        pinned_client = APIClient()
+        pinned_client.credentials(
+            HTTP_AUTHORIZATION=user_client._credentials['HTTP_AUTHORIZATION'])
+        pinned_client.cookies[PIN_COOKIE] = f'{user.pk}:forged:signature'
+        served_by, _ = get_served_by(
+            pinned_client, f'/api/v1/titles/{titles[1]["id"]}/?forged=1')
+        assert served_by == {REPLICA}, (
+            'Проверьте, что cookie закрепления без верной подписи '
+            'игнорируется.'
+        )
+
+        del user_client.cookies[PIN_COOKIE]
+        served_by, _ = get_served_by(
+            user_client, f'/api/v1/titles/{titles[1]["id"]}/')
+        assert served_by == {REPLICA}, (
+            'Проверьте, что после окончания окна закрепления пользователь '
+            'снова читает из реплики.'
+        )
+
+    def test_03_no_replicas(self, client, admin_client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert context.captured_queries, (
+            'Проверьте, что без реплик чтение идёт из основной базы.'
+        )
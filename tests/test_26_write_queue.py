@@ -0,0 +1,115 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, connections
+from rest_framework.test import APIClient
+
+from api_yamdb.sqlite3.writequeue import (WriteQueue, WriteQueueFull,
+                                          WriteQueueTimeout, get_queue)
+from tests.utils import create_single_review, create_titles
+
+THREADS = 8
+
+
+@pytest.fixture
+def held_queue(monkeypatch):
+    def hold(**options):
+        monkeypatch.setitem(
+            connection.settings_dict['OPTIONS'], 'write_queue', options)
+        queue = get_queue(connection.settings_dict['NAME'])
+        queue.acquire()
+        holders.append(queue)
+
+    holders = []
+    yield hold
+    for queue in holders:
+        queue.release()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26WriteQueue:
+
+    def test_01_fifo_handoff(self):
+        queue = WriteQueue()
+        queue.acquire()
+        order = []
+
+        def wait(idx):
+            queue.acquire(timeout=5)
+            order.append(idx)
+            queue.release()
+
+        threads = []
+        for idx in range(THREADS):
+            thread = threading.Thread(target=wait, args=(idx,))
+            thread.start()
+            threads.append(thread)
+            while len(queue.waiters) <= idx:
+                pass
+        queue.release()
+        for thread in threads:
+            thread.join()
+        assert order == list(range(THREADS)), (
+            'Проверьте, что право записи передаётся в порядке очереди.'
+        )
+        assert not queue.locked
+
+    def test_02_bounded_waiting(self):
+        queue = WriteQueue()
+        queue.acquire()
+        with pytest.raises(WriteQueueTimeout):
+            queue.acquire(timeout=0.01)
+        assert not queue.waiters, (
+            'Проверьте, что поток, не дождавшийся очереди, покидает её.'
+        )
+        with pytest.raises(WriteQueueFull):
+            queue.acquire(timeout=1, max_waiting=0)
+        queue.release()
+        queue.acquire(timeout=0.01)
+
+    def test_03_busy_queue_returns_503(self, user_client, admin_client,
+                                       held_queue):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Текст', 7).json()
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{review["id"]}/comments/')
+
+        held_queue(timeout=0.05, max_waiting=THREADS)
+        response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE, (
+            f'Проверьте, что POST-запрос к `{url}` отвечает 503, если '
+            'запись не дождалась очереди.'
+        )
+        assert response['Retry-After']
+
+    def test_04_concurrent_comments(self, admin_client, token_user):
+        from reviews.models import Comment
+
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            admin_client, titles[0]['id'], 'Текст', 7).json()
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{review["id"]}/comments/')
+        barrier = threading.Barrier(THREADS)
+
+        def post(idx):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}')
+            barrier.wait()
+            try:
+                return client.post(
+                    url, data={'text': f'Комментарий {idx}'}).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            statuses = list(executor.map(post, range(THREADS)))
+        assert statuses == [HTTPStatus.CREATED] * THREADS, (
+            'Проверьте, что одновременные комментарии записываются без '
+            'ошибок блокировки базы.'
+        )
+        assert Comment.objects.count() == THREADS
@@ -0,0 +1,72 @@
+import json
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+
+ENDPOINTS = ('titles', 'title', 'reviews', 'comments', 'signup', 'token')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Benchmark:
+
+    def test_01_power_law_split(self):
+        from reviews.synthetic import split_power_law
+
+        counts = split_power_law(1000, 50, 1.1, 40)
+        assert sum(counts) == 1000
+        assert max(counts) == 40, (
+            'Проверьте, что у произведения не больше отзывов, чем авторов.'
+        )
+        assert counts == sorted(counts, reverse=True), (
+            'Проверьте, что отзывы распределены по убыванию популярности.'
+        )
+        assert sum(split_power_law(1000, 5, 1.1, 10)) == 50
+
+    def test_02_generate_dataset(self):
+        from reviews.models import Comment, Review, Title, User
+        from reviews.synthetic import generate_dataset
+        from reviews.validators import get_invalid_name_chars
+
+        created = generate_dataset(
+            users=100, titles=20, genres=4, categories=2, reviews=300,
+            comments=100, seed=1)
+        assert created['Review'] == Review.objects.count() == 300
+        assert Comment.objects.count() == 100
+        pairs = Review.objects.values_list('author_id', 'title_id')
+        assert len(set(pairs)) == len(pairs), (
+            'Проверьте, что пары (автор, произведение) не повторяются.'
+        )
+        per_title = Counter(title_id for _, title_id in pairs)
+        top = per_title.most_common()
+        assert top[0][1] > 3 * top[len(top) // 2][1], (
+            'Проверьте, что отзывы сосредоточены на популярных '
+            'произведениях.'
+        )
+        title = Title.objects.get(pk=top[0][0])
+        assert title.rating_count == top[0][1], (
+            'Проверьте, что рейтинг произведений пересчитан.'
+        )
+        assert not any(
+            get_invalid_name_chars(username)
+            for username in User.objects.values_list('username', flat=True)
+        )
+
+    def test_03_benchapi_json(self, tmp_path):
+        output = tmp_path / 'results.json'
+        call_command(
+            'benchapi', generate=True, users=20, titles=10, genres=3,
+            categories=2, reviews=60, comments=30, seed=1, requests=4,
+            concurrency=2, output=output, stdout=open(tmp_path / 'log', 'w'))
+        results = json.loads(output.read_text())
+        assert results['dataset']['Review'] == 60
+        for endpoint in ENDPOINTS:
+            result = results['endpoints'][endpoint]
+            assert result['requests'] == 4
+            assert result['errors'] == 0, (
+                f'Проверьте, что эндпоинт {endpoint} отвечает без ошибок '
+                'под нагрузкой.'
+            )
+            assert {'throughput', 'p50_ms', 'p95_ms', 'p99_ms',
+                    'queries_mean'} <= set(result)
+        assert results['endpoints']['reviews']['queries_mean'] > 0
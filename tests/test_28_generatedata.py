@@ -0,0 +1,77 @@
+import datetime as dt
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count, Sum
+
+SIZES = {
+    'users': 60, 'titles': 30, 'genres': 5, 'categories': 3,
+    'reviews': 500, 'comments': 300,
+}
+
+
+def schema_objects():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE type IN ('index', 'trigger') ORDER BY name")
+        return cursor.fetchall()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28GenerateData:
+
+    def test_01_dataset(self, client):
+        from reviews.models import Comment, Review, Title, User
+        from reviews.validators import get_invalid_name_chars
+
+        objects = schema_objects()
+        call_command('generatedata', seed=3, batch_size=100,
+                     stdout=StringIO(), **SIZES)
+        assert schema_objects() == objects, (
+            'Проверьте, что индексы и триггеры восстановлены после '
+            'загрузки.'
+        )
+        assert Review.objects.count() == SIZES['reviews']
+        assert Comment.objects.count() == SIZES['comments']
+        pairs = list(Review.objects.values_list('author_id', 'title_id'))
+        assert len(set(pairs)) == len(pairs)
+        assert not any(
+            get_invalid_name_chars(username)
+            for username in User.objects.values_list('username', flat=True)
+        ), 'Проверьте, что имена пользователей проходят validate_name.'
+        assert not Title.objects.filter(
+            year__gt=dt.date.today().year).exists()
+
+        for title in Title.objects.annotate(
+                total=Sum('reviews__score'), number=Count('reviews')):
+            assert (title.rating_sum, title.rating_count) == (
+                title.total or 0, title.number), (
+                'Проверьте, что рейтинг произведений соответствует отзывам.'
+            )
+
+        review = Review.objects.first()
+        word = review.text.split()[0].rstrip('.')
+        response = client.get(
+            f'/api/v1/titles/{review.title_id}/reviews/', {'search': word})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'], (
+            'Проверьте, что полнотекстовый индекс перестроен после '
+            'загрузки.'
+        )
+
+    def test_02_appends_to_existing_data(self):
+        from reviews.models import Review, User
+
+        call_command('generatedata', seed=1, stdout=StringIO(), **SIZES)
+        call_command('generatedata', seed=1, stdout=StringIO(), **SIZES)
+        assert Review.objects.count() == 2 * SIZES['reviews']
+        assert User.objects.count() == 2 * SIZES['users']
+
+    def test_03_titles_need_category(self):
+        with pytest.raises(CommandError):
+            call_command('generatedata', **{**SIZES, 'categories': 0},
+                         stdout=StringIO())
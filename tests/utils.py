@@ -1,4 +1,13 @@
+import os
+import subprocess
+import sys
 from http import HTTPStatus
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+MANAGE_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb'
 
 
 check_name_and_slug_patterns = (
@@ -305,3 +314,33 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def check_query_budget(client, url, max_queries):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+        'статусом 200.'
+    )
+    assert len(context) <= max_queries, (
+        f'GET-запрос к `{url}` выполнил {len(context)} SQL-запросов '
+        f'при допустимых {max_queries}:\n'
+        + '\n'.join(query['sql'] for query in context.captured_queries)
+    )
+    return response
+
+
+def run_manage(*args, **env):
+    """
+    Запускает manage.py в отдельном процессе с тестовой базой: его кеш
+    и память не общие с тестом, как у другого воркера.
+    """
+    connection.close()
+    result = subprocess.run(
+        [sys.executable, 'manage.py', *args], cwd=MANAGE_DIR,
+        env={**os.environ, 'PYTHONPATH': str(MANAGE_DIR),
+             'DB_NAME': connection.settings_dict['NAME'], **env},
+        capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout